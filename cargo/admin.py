@@ -1,8 +1,68 @@
+from itertools import islice
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Concat
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
+from users.models import User
 from .models import Cargo, CargoDocument, CargoStatusHistory, CarrierRequest
 
+BULK_STATUS_CHUNK_SIZE = 2000
+
+# Below this many rows an exact COUNT(*) is cheap and preferred
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the row count of an unfiltered table from
+    the pg_class statistics instead of running COUNT(*) over it
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            # reltuples is -1 until the table is first vacuumed/analyzed
+            if row and row[0] >= ESTIMATED_COUNT_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class DeferringChangeList(ChangeList):
+    """ChangeList that doesn't fetch the columns in model_admin.changelist_defer"""
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.defer(*self.model_admin.changelist_defer)
+
+
+class DeferredColumnsAdminMixin:
+    """
+    Skip large columns that list_display doesn't render, on the
+    changelist only: the change form still loads complete rows
+    """
+    changelist_defer = ()
+
+    def get_changelist(self, request, **kwargs):
+        return DeferringChangeList
+
+
+# Document preview templates for CargoDocumentAdmin.get_file_preview
+_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif'})
+_IMAGE_PREVIEW = '<img src="{}" height="50"/>'
+_FILE_LINK = '<a href="{}" target="_blank">View File</a>'
+
 @admin.register(CarrierRequest)
 class CarrierRequestAdmin(admin.ModelAdmin):
     list_display = (
@@ -16,6 +76,7 @@ class CarrierRequestAdmin(admin.ModelAdmin):
         'loading_point', 'unloading_point'
     )
     raw_id_fields = ['carrier', 'vehicle', 'loading_location', 'unloading_location']
+    list_select_related = ('carrier', 'vehicle')
     ordering = ['-created_at']
 
 
@@ -31,10 +92,15 @@ class CargoStatusHistoryInline(admin.TabularInline):
     extra = 0
     readonly_fields = ['changed_at']
     fields = ['status', 'changed_by', 'changed_at', 'comment']
+    # A select widget would query and render every user for each row
+    raw_id_fields = ['changed_by']
     ordering = ['-changed_at']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('changed_by')
+
 @admin.register(Cargo)
-class CargoAdmin(admin.ModelAdmin):
+class CargoAdmin(DeferredColumnsAdminMixin, admin.ModelAdmin):
     list_display = (
         'title', 'get_route', 'status', 'owner',
         'vehicle_type', 'loading_date', 'price',
@@ -45,11 +111,22 @@ class CargoAdmin(admin.ModelAdmin):
         'payment_method', 'is_constant', 'is_ready',
         'created_at'
     )
+    # Choice/boolean/date filters render from field definitions; facet
+    # counts would add a COUNT per filter option over the whole table
+    show_facets = admin.ShowFacets.NEVER
     search_fields = (
         'title', 'description', 'loading_point',
         'unloading_point', 'owner__username'
     )
     raw_id_fields = ['owner', 'loading_location', 'unloading_location']
+    list_select_related = ('owner',)
+    paginator = EstimatedCountPaginator
+    changelist_defer = (
+        'description', 'additional_points', 'payment_details',
+        'approval_notes', 'search_vector'
+    )
+    # Skip the extra unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
     ordering = ['-created_at']
     date_hierarchy = 'created_at'
     
@@ -100,32 +177,82 @@ class CargoAdmin(admin.ModelAdmin):
         'created_at', 'updated_at', 'views_count'
     ]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            route=Concat(
+                'loading_point', Value(' → '), 'unloading_point',
+                output_field=CharField()
+            )
+        )
+    
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search title, description and route points through the
+        search_vector GIN index instead of LIKE over every column
+        """
+        if not search_term:
+            return queryset, False
+        
+        query = SearchQuery(search_term, config='simple', search_type='websearch')
+        # No rank ordering: the changelist re-applies get_ordering() after search
+        queryset = queryset.filter(
+            Q(search_vector=query) |
+            Q(owner__in=User.objects.filter(username__icontains=search_term))
+        )
+        # Only forward FKs are involved, rows can't be duplicated
+        return queryset, False
+    
     def get_route(self, obj):
-        return f"{obj.loading_point} → {obj.unloading_point}"
+        return obj.route
     get_route.short_description = _('Route')
+    get_route.admin_order_field = 'route'
     
     def save_model(self, request, obj, form, change):
-        if change:
-            if 'status' in form.changed_data:
-                CargoStatusHistory.objects.create(
-                    cargo=obj,
-                    status=obj.status,
-                    changed_by=request.user,
-                    comment='Changed from admin'
-                )
+        # The admin already runs this in one transaction with the cargo
+        # UPDATE; history is written after it so a failed save leaves none
         super().save_model(request, obj, form, change)
+        if change and 'status' in form.changed_data:
+            CargoStatusHistory.objects.create(
+                cargo=obj,
+                status=obj.status,
+                changed_by=request.user,
+                comment='Changed from admin'
+            )
     
     actions = ['mark_as_active', 'mark_as_completed', 'mark_as_cancelled']
     
-    def mark_as_active(self, request, queryset):
-        updated = queryset.update(status='active')
-        for cargo in queryset:
-            CargoStatusHistory.objects.create(
-                cargo=cargo,
-                status='active',
-                changed_by=request.user,
-                comment='Marked as active from admin'
+    def _bulk_change_status(self, request, queryset, new_status, comment):
+        """
+        Set status on selected cargos and record history in bulk.
+        Selected rows are streamed in chunks, so memory stays bounded
+        even when the whole changelist is selected.
+        """
+        total = 0
+        with transaction.atomic():
+            pks = queryset.values_list('pk', flat=True).iterator(
+                chunk_size=BULK_STATUS_CHUNK_SIZE
             )
+            while ids := list(islice(pks, BULK_STATUS_CHUNK_SIZE)):
+                Cargo.objects.filter(pk__in=ids).update(status=new_status)
+
+                CargoStatusHistory.objects.bulk_create_with_notifications([
+                    CargoStatusHistory(
+                        cargo_id=pk,
+                        status=new_status,
+                        changed_by=request.user,
+                        comment=comment
+                    )
+                    for pk in ids
+                ])
+
+                total += len(ids)
+
+        return total
+
+    def mark_as_active(self, request, queryset):
+        updated = self._bulk_change_status(
+            request, queryset, 'active', 'Marked as active from admin'
+        )
         self.message_user(
             request,
             _(f'{updated} cargos were marked as active.')
@@ -133,14 +260,9 @@ class CargoAdmin(admin.ModelAdmin):
     mark_as_active.short_description = _('Mark selected cargos as active')
     
     def mark_as_completed(self, request, queryset):
-        updated = queryset.update(status='completed')
-        for cargo in queryset:
-            CargoStatusHistory.objects.create(
-                cargo=cargo,
-                status='completed',
-                changed_by=request.user,
-                comment='Marked as completed from admin'
-            )
+        updated = self._bulk_change_status(
+            request, queryset, 'completed', 'Marked as completed from admin'
+        )
         self.message_user(
             request,
             _(f'{updated} cargos were marked as completed.')
@@ -148,14 +270,9 @@ class CargoAdmin(admin.ModelAdmin):
     mark_as_completed.short_description = _('Mark selected cargos as completed')
     
     def mark_as_cancelled(self, request, queryset):
-        updated = queryset.update(status='cancelled')
-        for cargo in queryset:
-            CargoStatusHistory.objects.create(
-                cargo=cargo,
-                status='cancelled',
-                changed_by=request.user,
-                comment='Marked as cancelled from admin'
-            )
+        updated = self._bulk_change_status(
+            request, queryset, 'cancelled', 'Marked as cancelled from admin'
+        )
         self.message_user(
             request,
             _(f'{updated} cargos were marked as cancelled.')
@@ -163,7 +280,7 @@ class CargoAdmin(admin.ModelAdmin):
     mark_as_cancelled.short_description = _('Mark selected cargos as cancelled')
 
 @admin.register(CargoDocument)
-class CargoDocumentAdmin(admin.ModelAdmin):
+class CargoDocumentAdmin(DeferredColumnsAdminMixin, admin.ModelAdmin):
     list_display = (
         'cargo', 'type', 'title',
         'uploaded_at', 'get_file_preview'
@@ -174,19 +291,19 @@ class CargoDocumentAdmin(admin.ModelAdmin):
         'cargo__owner__username'
     )
     raw_id_fields = ['cargo']
+    list_select_related = ('cargo',)
+    changelist_defer = (
+        'notes', 'cargo__description', 'cargo__additional_points',
+        'cargo__payment_details', 'cargo__approval_notes', 'cargo__search_vector'
+    )
     ordering = ['-uploaded_at']
     
     def get_file_preview(self, obj):
         if obj.file:
-            if obj.file.name.lower().endswith(('.jpg', '.jpeg', '.png', '.gif')):
-                return format_html(
-                    '<img src="{}" height="50"/>',
-                    obj.file.url
-                )
-            return format_html(
-                '<a href="{}" target="_blank">View File</a>',
-                obj.file.url
-            )
+            name = obj.file.name
+            ext = name[name.rfind('.'):].lower() if '.' in name else ''
+            template = _IMAGE_PREVIEW if ext in _IMAGE_EXTENSIONS else _FILE_LINK
+            return format_html(template, obj.file.url)
         return "-"
     get_file_preview.short_description = _('File Preview')
 
@@ -202,5 +319,6 @@ class CargoStatusHistoryAdmin(admin.ModelAdmin):
         'comment'
     )
     raw_id_fields = ['cargo', 'changed_by']
+    list_select_related = ('cargo', 'changed_by')
     ordering = ['-changed_at']
     readonly_fields = ['changed_at']
\ No newline at end of file
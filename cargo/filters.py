@@ -1,8 +1,46 @@
 import django_filters
+from django import forms
+from django.core.exceptions import ValidationError
 from django.db.models import Q
 from .models import Cargo
 from core.models import Location
-from math import radians, cos, sin, asin, sqrt
+from core.cache import get_cached_location
+from core.services.location import LocationService
+
+
+class CachedLocationChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField for Location that resolves the submitted id
+    through the location cache instead of querying the database
+    """
+    def __init__(self, *args, level, **kwargs):
+        self.level = level
+        super().__init__(*args, **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            location = get_cached_location(int(value))
+        except (TypeError, ValueError):
+            location = None
+        if location is None or location.level != self.level:
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+                params={'value': value},
+            )
+        return location
+
+
+class LocationChoiceFilter(django_filters.ModelChoiceFilter):
+    """Filter by a Location of the given level, looked up via cache"""
+    field_class = CachedLocationChoiceField
+
+    def __init__(self, *args, level, **kwargs):
+        kwargs.setdefault('queryset', Location.objects.filter(level=level))
+        super().__init__(*args, level=level, **kwargs)
+
 
 class CargoFilter(django_filters.FilterSet):
     min_weight = django_filters.NumberFilter(
@@ -39,28 +77,28 @@ class CargoFilter(django_filters.FilterSet):
     )
     
     # Фильтры для Location
-    loading_location = django_filters.ModelChoiceFilter(
-        queryset=Location.objects.filter(level=3),
+    loading_location = LocationChoiceFilter(
+        level=3,
         field_name='loading_location'
     )
-    unloading_location = django_filters.ModelChoiceFilter(
-        queryset=Location.objects.filter(level=3),
+    unloading_location = LocationChoiceFilter(
+        level=3,
         field_name='unloading_location'
     )
-    loading_country = django_filters.ModelChoiceFilter(
-        queryset=Location.objects.filter(level=1),
+    loading_country = LocationChoiceFilter(
+        level=1,
         method='filter_loading_country'
     )
-    unloading_country = django_filters.ModelChoiceFilter(
-        queryset=Location.objects.filter(level=1),
+    unloading_country = LocationChoiceFilter(
+        level=1,
         method='filter_unloading_country'
     )
-    loading_state = django_filters.ModelChoiceFilter(
-        queryset=Location.objects.filter(level=2),
+    loading_state = LocationChoiceFilter(
+        level=2,
         method='filter_loading_state'
     )
-    unloading_state = django_filters.ModelChoiceFilter(
-        queryset=Location.objects.filter(level=2),
+    unloading_state = LocationChoiceFilter(
+        level=2,
         method='filter_unloading_state'
     )
     
@@ -78,6 +116,22 @@ class CargoFilter(django_filters.FilterSet):
             'is_constant': ['exact'],
             'is_ready': ['exact'],
         }
+
+    # Location filters backed by LocationChoiceFilter
+    LOCATION_FILTERS = (
+        'loading_location', 'unloading_location',
+        'loading_country', 'unloading_country',
+        'loading_state', 'unloading_state',
+    )
+
+    def __init__(self, data=None, *args, **kwargs):
+        super().__init__(data, *args, **kwargs)
+        # Drop location filters that are not requested so their
+        # Location querysets and form fields are never built
+        if self.is_bound:
+            for name in self.LOCATION_FILTERS:
+                if name not in self.data:
+                    self.filters.pop(name, None)
     
     def filter_location(self, queryset, name, value):
         """
@@ -119,7 +173,7 @@ class CargoFilter(django_filters.FilterSet):
                         location.latitude, location.longitude, value
                     )
                     filtered_queryset = filtered_queryset.filter(
-                        loading_location__in=locations_in_radius
+                        loading_location__in=locations_in_radius.values('id')
                     )
             except Location.DoesNotExist:
                 pass
@@ -136,7 +190,7 @@ class CargoFilter(django_filters.FilterSet):
                         location.latitude, location.longitude, value
                     )
                     filtered_queryset = filtered_queryset.filter(
-                        unloading_location__in=locations_in_radius
+                        unloading_location__in=locations_in_radius.values('id')
                     )
             except Location.DoesNotExist:
                 pass
@@ -148,10 +202,8 @@ class CargoFilter(django_filters.FilterSet):
         if not value:
             return queryset
         
-        # Ищем все Location с указанной страной
         return queryset.filter(
-            Q(loading_location__country=value) |
-            Q(loading_location=value)  # Если сама страна выбрана как локация
+            loading_location__in=self._locations_under(value, 'country')
         )
     
     def filter_unloading_country(self, queryset, name, value):
@@ -159,10 +211,8 @@ class CargoFilter(django_filters.FilterSet):
         if not value:
             return queryset
         
-        # Ищем все Location с указанной страной
         return queryset.filter(
-            Q(unloading_location__country=value) |
-            Q(unloading_location=value)  # Если сама страна выбрана как локация
+            unloading_location__in=self._locations_under(value, 'country')
         )
     
     def filter_loading_state(self, queryset, name, value):
@@ -170,10 +220,8 @@ class CargoFilter(django_filters.FilterSet):
         if not value:
             return queryset
         
-        # Ищем все Location с указанным регионом или который является регионом
         return queryset.filter(
-            Q(loading_location__parent=value) |
-            Q(loading_location=value)  # Если сам штат выбран как локация
+            loading_location__in=self._locations_under(value, 'parent')
         )
     
     def filter_unloading_state(self, queryset, name, value):
@@ -181,46 +229,24 @@ class CargoFilter(django_filters.FilterSet):
         if not value:
             return queryset
         
-        # Ищем все Location с указанным регионом или который является регионом
         return queryset.filter(
-            Q(unloading_location__parent=value) |
-            Q(unloading_location=value)  # Если сам штат выбран как локация
+            unloading_location__in=self._locations_under(value, 'parent')
         )
     
-    def _get_locations_in_radius(self, lat, lon, radius_km):
+    def _locations_under(self, location, ancestor_field):
         """
-        Получить все локации в указанном радиусе
-        Используем формулу Гаверсинуса для расчета расстояния
+        Subquery of location IDs inside the given country/state,
+        including the location itself (если она выбрана как локация)
         """
-        locations = []
-        
-        # Получаем все локации уровня 3 (города)
-        cities = Location.objects.filter(level=3)
-        
-        for city in cities:
-            if city.latitude and city.longitude:
-                distance = self._haversine(
-                    float(lat), float(lon),
-                    float(city.latitude), float(city.longitude)
-                )
-                if distance <= radius_km:
-                    locations.append(city.id)
-        
-        return locations
+        return Location.objects.filter(
+            Q(**{ancestor_field: location}) | Q(pk=location.pk)
+        ).values('id')
     
-    def _haversine(self, lat1, lon1, lat2, lon2):
+    def _get_locations_in_radius(self, lat, lon, radius_km):
         """
-        Расчет расстояния между двумя точками по формуле Гаверсинуса
-        Результат в километрах
+        Получить все локации (города) в указанном радиусе
+        Возвращает queryset, расстояние считается на стороне базы данных
         """
-        # Конвертируем градусы в радианы
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        
-        # Формула Гаверсинуса
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        r = 6371  # Радиус Земли в километрах
-        
-        return c * r
\ No newline at end of file
+        return LocationService.locations_in_radius_queryset(
+            float(lat), float(lon), float(radius_km)
+        )
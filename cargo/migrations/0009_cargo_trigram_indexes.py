@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-15 09:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0008_carrierrequest_loading_location_and_more'),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('loading_point'), name='gin_trgm_ops'), name='cargo_loading_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('unloading_point'), name='gin_trgm_ops'), name='cargo_unloading_trgm_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.5 on 2026-10-15 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0009_cargo_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['status', '-created_at'], name='cargo_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['status', 'loading_date'], name='cargo_status_loading_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['owner', 'status'], name='cargo_owner_status_idx'),
+        ),
+    ]
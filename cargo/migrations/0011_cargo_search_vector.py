@@ -0,0 +1,43 @@
+# Generated by Django 5.1.5 on 2026-10-15 10:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0010_cargo_status_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cargo',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='cargo_search_vector_idx'),
+        ),
+        # Listings are in Russian/Uzbek, so the language-neutral 'simple'
+        # configuration is used instead of a stemming dictionary
+        migrations.RunSQL(
+            sql="""
+                CREATE TRIGGER cargo_search_vector_update
+                BEFORE INSERT OR UPDATE OF title, description, loading_point, unloading_point, search_vector
+                ON cargo_cargo
+                FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger(
+                    search_vector, 'pg_catalog.simple',
+                    title, description, loading_point, unloading_point
+                );
+                UPDATE cargo_cargo SET search_vector = to_tsvector(
+                    'pg_catalog.simple',
+                    coalesce(title, '') || ' ' || coalesce(description, '') || ' ' ||
+                    coalesce(loading_point, '') || ' ' || coalesce(unloading_point, '')
+                );
+            """,
+            reverse_sql="DROP TRIGGER IF EXISTS cargo_search_vector_update ON cargo_cargo;",
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.5 on 2026-10-15 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0011_cargo_search_vector'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cargo',
+            name='cargo_cargo_status_306572_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cargo',
+            name='cargo_cargo_owner_i_3f0b64_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cargo',
+            name='cargo_cargo_assigne_efacb7_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cargo',
+            name='cargo_cargo_managed_9919ee_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cargo',
+            name='cargo_cargo_loading_36d4cb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='cargo',
+            name='cargo_cargo_unloadi_283c75_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='carrierrequest',
+            name='cargo_carri_carrier_9aec82_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='carrierrequest',
+            name='cargo_carri_status_87fdd6_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='carrierrequest',
+            name='cargo_carri_loading_9e25b1_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='carrierrequest',
+            name='cargo_carri_unloadi_a5dd68_idx',
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(fields=['assigned_to', 'status'], name='cargo_assigned_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carrierrequest',
+            index=models.Index(fields=['status', '-created_at'], name='carrier_req_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carrierrequest',
+            index=models.Index(fields=['carrier', 'status'], name='carrier_req_carrier_status_idx'),
+        ),
+    ]
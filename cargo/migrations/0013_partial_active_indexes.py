@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-15 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0012_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'pending_approval', 'manager_approved', 'assigned', 'in_progress'])), fields=['-created_at'], name='cargo_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carrierrequest',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'assigned', 'accepted'])), fields=['-created_at'], name='carrier_req_active_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.1.5 on 2026-10-15 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_additional_locations(apps, schema_editor):
+    """Move rows of the implicit M2M table to CargoRouteStop, keeping insertion order"""
+    Cargo = apps.get_model('cargo', 'Cargo')
+    CargoRouteStop = apps.get_model('cargo', 'CargoRouteStop')
+    Through = Cargo.additional_locations.through
+
+    stops = []
+    sequence_by_cargo = {}
+    for cargo_id, location_id in Through.objects.order_by('id').values_list('cargo_id', 'location_id'):
+        sequence = sequence_by_cargo.get(cargo_id, 0)
+        sequence_by_cargo[cargo_id] = sequence + 1
+        stops.append(CargoRouteStop(cargo_id=cargo_id, location_id=location_id, sequence=sequence))
+    CargoRouteStop.objects.bulk_create(stops, batch_size=1000)
+
+
+def copy_route_stops(apps, schema_editor):
+    Cargo = apps.get_model('cargo', 'Cargo')
+    CargoRouteStop = apps.get_model('cargo', 'CargoRouteStop')
+    Through = Cargo.additional_locations.through
+
+    Through.objects.bulk_create(
+        [
+            Through(cargo_id=cargo_id, location_id=location_id)
+            for cargo_id, location_id in CargoRouteStop.objects.values_list(
+                'cargo_id', 'location_id'
+            )
+        ],
+        batch_size=1000,
+        # The implicit table allows each location once per cargo
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0013_partial_active_indexes'),
+        ('core', '0005_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CargoRouteStop',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveSmallIntegerField(default=0)),
+                ('cargo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='route_stops', to='cargo.cargo')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cargo_route_stops', to='core.location')),
+            ],
+            options={
+                'ordering': ['sequence'],
+                'indexes': [models.Index(fields=['cargo', 'sequence'], name='cargo_route_stop_seq_idx')],
+            },
+        ),
+        migrations.RunPython(copy_additional_locations, copy_route_stops),
+        migrations.RemoveField(
+            model_name='cargo',
+            name='additional_locations',
+        ),
+        migrations.AddField(
+            model_name='cargo',
+            name='additional_locations',
+            field=models.ManyToManyField(blank=True, related_name='intermediate_cargos', through='cargo.CargoRouteStop', to='core.location'),
+        ),
+    ]
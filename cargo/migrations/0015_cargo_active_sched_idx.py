@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-15 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0014_cargoroutestop'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='cargo',
+            name='cargo_status_loading_idx',
+        ),
+        migrations.AddIndex(
+            model_name='cargo',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'pending_approval', 'manager_approved', 'assigned', 'in_progress'])), fields=['status', 'loading_date'], name='cargo_active_sched_idx'),
+        ),
+    ]
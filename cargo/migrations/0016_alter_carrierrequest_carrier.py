@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-15 14:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0015_cargo_active_sched_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='carrierrequest',
+            name='carrier',
+            field=models.ForeignKey(db_index=False, limit_choices_to={'role': 'carrier'}, on_delete=django.db.models.deletion.CASCADE, related_name='carrier_requests', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-15 14:20
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0016_alter_carrierrequest_carrier'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carrierrequest',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('loading_point'), name='gin_trgm_ops'), name='carrier_req_loading_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carrierrequest',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('unloading_point'), name='gin_trgm_ops'), name='carrier_req_unload_trgm_idx'),
+        ),
+    ]
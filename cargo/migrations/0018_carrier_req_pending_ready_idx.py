@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-15 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0017_carrierrequest_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carrierrequest',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['ready_date'], name='carrier_req_pending_ready_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.5 on 2026-10-15 14:50
+
+from django.db import migrations, models
+
+
+def detach_duplicate_sources(apps, schema_editor):
+    """
+    Earlier imports could create the same external record twice. Keep the
+    link on the newest copy and clear source_id on the others, so they stay
+    as plain cargos and the constraint can be created. Blank ids may repeat
+    and are left as they are.
+    """
+    Cargo = apps.get_model('cargo', 'Cargo')
+
+    duplicates = (
+        Cargo.objects.filter(source_id__isnull=False)
+        .exclude(source_id='')
+        .values('source_type', 'source_id')
+        .annotate(newest=models.Max('id'), copies=models.Count('id'))
+        .filter(copies__gt=1)
+    )
+    for row in duplicates.iterator():
+        Cargo.objects.filter(
+            source_type=row['source_type'],
+            source_id=row['source_id']
+        ).exclude(id=row['newest']).update(source_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cargo', '0018_carrier_req_pending_ready_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(detach_duplicate_sources, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='cargo',
+            name='cargo_cargo_source__d72990_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='cargo',
+            constraint=models.UniqueConstraint(condition=models.Q(('source_id__isnull', False), models.Q(('source_id', ''), _negated=True)), fields=('source_type', 'source_id'), name='cargo_source_uniq'),
+        ),
+    ]
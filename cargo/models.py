@@ -1,11 +1,72 @@
-from django.db import models
+import io
+import json
+
+import numpy as np
+
+from django.db import connections, models, transaction
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from users.models import User
 from django.utils import timezone
 from vehicles.models import Vehicle
 
-class CarrierRequest(models.Model):
+def recipient_telegram_ids(recipients):
+    """
+    Telegram IDs of notification recipients.
+    recipients is a User queryset (only the IDs are fetched) or an
+    iterable of users or telegram IDs (user foreign key values, since
+    telegram_id is the User primary key) that may contain None
+    """
+    if isinstance(recipients, models.QuerySet):
+        telegram_ids = recipients.values_list('telegram_id', flat=True)
+    else:
+        telegram_ids = (
+            user if isinstance(user, str) else user.telegram_id
+            for user in recipients
+            if user is not None
+        )
+    return [telegram_id for telegram_id in telegram_ids if telegram_id]
+
+
+class StatusSnapshotMixin:
+    """
+    Remembers the status a row had in the database when it was loaded,
+    so saves can detect status changes without re-fetching the row
+    """
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = instance.status
+        return instance
+
+    def get_loaded_status(self):
+        """Status as last loaded from or saved to the database"""
+        if self.pk is None:
+            return None
+        if not hasattr(self, '_loaded_status'):
+            # Instance wasn't loaded with its status (built by hand or deferred)
+            self._loaded_status = type(self)._default_manager.filter(
+                pk=self.pk
+            ).values_list('status', flat=True).first()
+        return self._loaded_status
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is None or 'status' in fields:
+            self._loaded_status = self.status
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'status' in update_fields:
+            self._loaded_status = self.status
+
+
+class CarrierRequest(StatusSnapshotMixin, models.Model):
     class RequestStatus(models.TextChoices):
         PENDING = 'pending', _('Pending')
         ASSIGNED = 'assigned', _('Assigned to Cargo')
@@ -19,7 +80,9 @@ class CarrierRequest(models.Model):
         User, 
         on_delete=models.CASCADE,
         related_name='carrier_requests',
-        limit_choices_to={'role': 'carrier'}
+        limit_choices_to={'role': User.UserRole.CARRIER},
+        # Covered by carrier_req_carrier_status_idx
+        db_index=False
     )
     vehicle = models.ForeignKey(
         Vehicle,
@@ -84,18 +147,38 @@ class CarrierRequest(models.Model):
         null=True,
         blank=True,
         related_name='assigned_carrier_requests',
-        limit_choices_to={'role': 'student'}
+        limit_choices_to={'role': User.UserRole.STUDENT}
     )
     assigned_at = models.DateTimeField(null=True, blank=True)
     
     class Meta:
         ordering = ['-created_at']
+        # The other foreign keys are indexed by Django already
         indexes = [
-            models.Index(fields=['carrier']),
-            models.Index(fields=['status']),
+            models.Index(fields=['status', '-created_at'], name='carrier_req_status_created_idx'),
+            models.Index(fields=['carrier', 'status'], name='carrier_req_carrier_status_idx'),
             models.Index(fields=['ready_date']),
-            models.Index(fields=['loading_point']),
-            models.Index(fields=['unloading_point']),
+            # Only open requests, finished ones are rarely queried
+            models.Index(
+                fields=['-created_at'],
+                name='carrier_req_active_idx',
+                condition=models.Q(status__in=['pending', 'assigned', 'accepted'])
+            ),
+            # Matching cargos to open requests: status='pending' AND ready_date <= ...
+            models.Index(
+                fields=['ready_date'],
+                name='carrier_req_pending_ready_idx',
+                condition=models.Q(status='pending')
+            ),
+            # icontains matching against cargo points (matching_carriers)
+            GinIndex(
+                OpClass(Upper('loading_point'), name='gin_trgm_ops'),
+                name='carrier_req_loading_trgm_idx'
+            ),
+            GinIndex(
+                OpClass(Upper('unloading_point'), name='gin_trgm_ops'),
+                name='carrier_req_unload_trgm_idx'
+            ),
         ]
         
     def __str__(self):
@@ -117,74 +200,145 @@ class CarrierRequest(models.Model):
     #         telegram_service.send_bulk_messages(messages)
     def notify_users(self, recipients, message):
         """Send notification to multiple users"""
-        from core.services.telegram import telegram_service
-        
-        messages = [
-            {"telegram_id": user.telegram_id, "message": message}
-            for user in recipients
-            if user is not None and user.telegram_id  # Check if user is None before accessing telegram_id
-        ]
+        from core.services.notifications import queue_broadcast
         
-        # Send messages if we have any recipients
-        if messages:
-            telegram_service.send_bulk_messages.delay(messages)
+        # One outbox row for all recipients, sent by the periodic task
+        queue_broadcast(message, recipient_telegram_ids(recipients))
 
 
     def save(self, *args, **kwargs):
         """Override save to handle notifications"""
         is_new = not self.pk
-        if not is_new:
-            old_status = CarrierRequest.objects.get(pk=self.pk).status
-            status_changed = old_status != self.status
+        update_fields = kwargs.get('update_fields')
+        if not is_new and (update_fields is None or 'status' in update_fields):
+            status_changed = self.get_loaded_status() != self.status
         else:
             status_changed = False
             
         super().save(*args, **kwargs)
+        self._maybe_notify(is_new=is_new, status_changed=status_changed)
+
+    def _maybe_notify(self, *, is_new, status_changed):
+        """Send notifications about creation or a status change"""
+        if not (is_new or status_changed):
+            return
         
         # Get notification service
         from core.services.telegram import telegram_service
         
         if is_new:
             # Notify students about new carrier request
-            students = User.objects.filter(role='student', is_active=True)
-            message = telegram_service.format_carrier_notification(
-                self,
-                "Новая заявка от перевозчика"
-            )
-            self.notify_users(students, message)
+            from core.cache import get_cached_role_telegram_ids
+            students = get_cached_role_telegram_ids(User.UserRole.STUDENT)
+            if students:
+                message = telegram_service.format_carrier_notification(
+                    self,
+                    "Новая заявка от перевозчика"
+                )
+                self.notify_users(students, message)
                         
         elif status_changed:
-            # Send notifications based on new status
-            message = telegram_service.format_carrier_notification(
-                self,
-                f"Статус заявки изменен на {self.get_status_display()}"
-            )
+            # Pick recipients first: formatting loads carrier and vehicle
             recipients = []
             
+            # User foreign key values are telegram IDs, no User lookups needed
             if self.status == self.RequestStatus.ASSIGNED:
                 # Notify carrier about assignment
-                recipients = [self.carrier]
+                recipients = [self.carrier_id]
                 
             elif self.status in [self.RequestStatus.ACCEPTED, self.RequestStatus.REJECTED]:
                 # Notify assigning student
-                if self.assigned_by:
-                    recipients = [self.assigned_by]
+                if self.assigned_by_id:
+                    recipients = [self.assigned_by_id]
                     
                 # Also notify cargo owner if request was accepted
-                if self.status == self.RequestStatus.ACCEPTED and self.assigned_cargo:
-                    recipients.append(self.assigned_cargo.owner)
+                if self.status == self.RequestStatus.ACCEPTED and self.assigned_cargo_id:
+                    recipients.append(self.assigned_cargo.owner_id)
             
             elif self.status == self.RequestStatus.COMPLETED:
                 # Notify carrier and cargo owner
-                recipients = [self.carrier]
-                if self.assigned_cargo:
-                    recipients.append(self.assigned_cargo.owner)
+                recipients = [self.carrier_id]
+                if self.assigned_cargo_id:
+                    recipients.append(self.assigned_cargo.owner_id)
             
             if recipients:
+                message = telegram_service.format_carrier_notification(
+                    self,
+                    f"Статус заявки изменен на {self.get_status_display()}"
+                )
                 self.notify_users(recipients, message)
 
 
-class Cargo(models.Model):
+def _copy_text(value):
+    """Encode a value for COPY ... FROM STDIN text format"""
+    if value is None:
+        return r'\N'
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+class CargoQuerySet(models.QuerySet):
+    def bulk_ingest(self, cargos):
+        """
+        Insert many unsaved cargos with a single COPY FROM STDIN.
+        Like bulk_create, this skips save() and signals (no notifications)
+        and doesn't set pk on the instances. Volume is still derived from
+        the dimensions. Returns the number of inserted rows.
+        """
+        cargos = list(cargos)
+        if not cargos:
+            return 0
+        for cargo in cargos:
+            cargo.derive_volume()
+        
+        connection = connections[self.db]
+        opts = self.model._meta
+        fields = [
+            field for field in opts.concrete_fields
+            if not field.primary_key and field.name != 'search_vector'
+        ]
+        
+        buffer = io.StringIO()
+        for cargo in cargos:
+            values = []
+            for field in fields:
+                value = field.pre_save(cargo, add=True)
+                if isinstance(field, models.JSONField):
+                    value = None if value is None else json.dumps(value, cls=field.encoder)
+                else:
+                    value = field.get_db_prep_save(value, connection)
+                values.append(_copy_text(value))
+            buffer.write('\t'.join(values))
+            buffer.write('\n')
+        buffer.seek(0)
+        
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+        with transaction.atomic(using=self.db), connection.cursor() as cursor:
+            # FK constraints are DEFERRABLE INITIALLY DEFERRED: the checks are
+            # deferred to commit, so the COPY isn't interrupted by per-row
+            # constraint triggers
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(opts.db_table)} ({columns}) FROM STDIN',
+                buffer
+            )
+        return len(cargos)
+
+
+# Cargo.volume is derived from these when all of them are set
+DIMENSION_FIELDS = frozenset({'length', 'width', 'height'})
+
+# Columns written by Cargo.approve/reject
+APPROVAL_UPDATE_FIELDS = [
+    'status', 'approved_by', 'approval_notes', 'approval_date', 'updated_at'
+]
+
+
+class Cargo(StatusSnapshotMixin, models.Model):
     class CargoStatus(models.TextChoices):
             DRAFT = 'draft', _('Draft')
             PENDING_APPROVAL = 'pending_approval', _('Pending Manager Approval')
@@ -283,17 +437,20 @@ class Cargo(models.Model):
         blank=True
     )
     
-    # Optional intermediate points
+    # Optional intermediate points, ordered by CargoRouteStop.sequence
     additional_locations = models.ManyToManyField(
         'core.Location',
+        through='CargoRouteStop',
         related_name='intermediate_cargos',
-        null=True,
         blank=True
     )
 
     # Route information
     loading_point = models.CharField(max_length=255)
     unloading_point = models.CharField(max_length=255)
+    # JSON fields are stored as jsonb and deliberately not indexed: they are
+    # only read back whole. Add a GinIndex(jsonb_path_ops) together with
+    # the first __contains/__has_key filter on them
     additional_points = models.JSONField(null=True, blank=True)
     
     # Timing
@@ -338,7 +495,7 @@ class Cargo(models.Model):
         null=True,
         blank=True,
         related_name='assigned_cargos',
-        limit_choices_to={'role': 'carrier'}
+        limit_choices_to={'role': User.UserRole.CARRIER}
     )
     managed_by = models.ForeignKey(
         User,
@@ -346,7 +503,7 @@ class Cargo(models.Model):
         null=True,
         blank=True,
         related_name='managed_cargos',
-        limit_choices_to={'role': 'student'}
+        limit_choices_to={'role': User.UserRole.STUDENT}
     )
     
     # Tracking
@@ -367,78 +524,101 @@ class Cargo(models.Model):
             null=True,
             blank=True,
             related_name='approved_cargos',
-            limit_choices_to={'role': 'manager'}
+            limit_choices_to={'role': User.UserRole.MANAGER}
         )
     approval_date = models.DateTimeField(null=True, blank=True)
     approval_notes = models.TextField(null=True, blank=True)
     
-    def get_distance(self):
-        """Calculate total route distance in km"""
-        from math import radians, sin, cos, sqrt, atan2
+    # Full-text search over title, description and route points,
+    # maintained by the cargo_search_vector_update database trigger
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    objects = CargoQuerySet.as_manager()
+    
+    @property
+    def route_locations(self):
+        """
+        Intermediate locations in route order.
+        Served from prefetch_related('route_stops__location') if used
+        """
+        stops = self.route_stops.all()
+        if 'route_stops' not in getattr(self, '_prefetched_objects_cache', {}):
+            stops = stops.select_related('location')
+        return [stop.location for stop in stops]
+    
+    def get_distance(self, *, locations=None):
+        """
+        Calculate total route distance in km.
+        locations are the intermediate points; by default route_locations
+        """
+        R = 6371  # Earth's radius in km
         
-        def haversine(lat1, lon1, lat2, lon2):
-            R = 6371  # Earth's radius in km
-            
-            lat1, lon1 = map(radians, [float(lat1), float(lon1)])
-            lat2, lon2 = map(radians, [float(lat2), float(lon2)])
-            
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            
-            a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-            c = 2 * atan2(sqrt(a), sqrt(1-a))
-            return R * c
-
-        total_distance = 0
-        prev_location = self.loading_location
+        if locations is None:
+            locations = self.route_locations
+        points = [
+            self.loading_location,
+            *locations,
+            self.unloading_location
+        ]
+        # Points without coordinates become NaN, so segments touching
+        # them drop out of the sum
+        coords = np.array([
+            (float(point.latitude), float(point.longitude))
+            if point is not None and point.latitude and point.longitude
+            else (np.nan, np.nan)
+            for point in points
+        ], dtype=np.float64)
+        lat = np.radians(coords[:, 0])
+        lon = np.radians(coords[:, 1])
         
-        # Add intermediate points if they exist
-        locations = list(self.additional_locations.all())
-        locations.append(self.unloading_location)
+        # Haversine for all consecutive segments at once
+        a = (
+            np.sin(np.diff(lat) / 2) ** 2 +
+            np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+        )
+        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
         
-        for location in locations:
-            if prev_location.latitude and prev_location.longitude and \
-               location.latitude and location.longitude:
-                distance = haversine(
-                    prev_location.latitude, prev_location.longitude,
-                    location.latitude, location.longitude
-                )
-                total_distance += distance
-            prev_location = location
-            
-        return round(total_distance)
+        return round(float(np.nansum(R * c)))
     
     def notify_users(self, recipients, message):
         """Send notification to multiple users"""
-        from core.services.telegram import telegram_service
+        from core.services.notifications import queue_broadcast
         
-        messages = [
-            {"telegram_id": user.telegram_id, "message": message}
-            for user in recipients
-            if user is not None and user.telegram_id  # Check if user is None before accessing telegram_id
-        ]
-        
-        # Send messages if we have any recipients
-        if messages:
-            telegram_service.send_bulk_messages.delay(messages)
+        # One outbox row for all recipients, sent by the periodic task
+        queue_broadcast(message, recipient_telegram_ids(recipients))
+
+    def derive_volume(self):
+        """Set volume from the dimensions; returns False if any is missing"""
+        if not all([self.length, self.width, self.height]):
+            return False
+        self.volume = self.length * self.width * self.height
+        return True
 
     def save(self, *args, **kwargs):
         """Override save to handle volume calculation and notifications"""
-        if all([self.length, self.width, self.height]):
-            self.volume = self.length * self.width * self.height
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or DIMENSION_FIELDS.intersection(update_fields):
+            if self.derive_volume():
+                if update_fields is not None:
+                    kwargs['update_fields'] = update_fields = {*update_fields, 'volume'}
             
         # Check if this is a new cargo or status has changed
         is_new = not self.pk
-        if not is_new:
-            old_status = Cargo.objects.get(pk=self.pk).status
-            status_changed = old_status != self.status
+        if not is_new and (update_fields is None or 'status' in update_fields):
+            status_changed = self.get_loaded_status() != self.status
         else:
             status_changed = False
 
-        if self.approved_by and not self.approval_date:
+        if self.approved_by_id and not self.approval_date:
             self.approval_date = timezone.now()
             
         super().save(*args, **kwargs)
+        self._maybe_notify(is_new=is_new, status_changed=status_changed)
+
+    def _maybe_notify(self, *, is_new, status_changed):
+        """Send notifications about creation or a status change"""
+        if not (is_new or status_changed):
+            return
         
         # Get notification service
         from core.services.telegram import telegram_service
@@ -446,49 +626,52 @@ class Cargo(models.Model):
         if is_new:
             # Notify managers about new cargo requiring approval
             if self.status == self.CargoStatus.PENDING_APPROVAL:
-                managers = User.objects.filter(role='manager', is_active=True)
-                message = telegram_service.format_cargo_notification(
-                    self,
-                    f"Новый груз требует проверки: {self.title}"
-                )
-                self.notify_users(managers, message)
+                from core.cache import get_cached_role_telegram_ids
+                managers = get_cached_role_telegram_ids(User.UserRole.MANAGER)
+                if managers:
+                    message = telegram_service.format_cargo_notification(
+                        self,
+                        f"Новый груз требует проверки: {self.title}"
+                    )
+                    self.notify_users(managers, message)
                         
         elif status_changed:
-            # Send notifications based on new status
-            message = telegram_service.format_cargo_notification(
-                self,
-                f"Статус груза изменен на {self.get_status_display()}: {self.title}"
-            )
+            # Pick recipients first, format only if someone will get it
             recipients = []
             
             if self.status == self.CargoStatus.MANAGER_APPROVED:
                 # Notify students about approved cargo
-                recipients = User.objects.filter(role='student', is_active=True)
+                from core.cache import get_cached_role_telegram_ids
+                recipients = get_cached_role_telegram_ids(User.UserRole.STUDENT)
                 
             elif self.status == self.CargoStatus.ASSIGNED:
-                # Notify assigned carrier
-                if self.assigned_to:
-                    recipients = [self.assigned_to]
+                # Notify assigned carrier (foreign key values are telegram IDs)
+                if self.assigned_to_id:
+                    recipients = [self.assigned_to_id]
             
             elif self.status in [self.CargoStatus.COMPLETED, self.CargoStatus.CANCELLED]:
                 # Notify owner and manager
-                recipients = [self.owner]
-                if self.approved_by:
-                    recipients.append(self.approved_by)
+                recipients = [self.owner_id]
+                if self.approved_by_id:
+                    recipients.append(self.approved_by_id)
             
             if recipients:
+                message = telegram_service.format_cargo_notification(
+                    self,
+                    f"Статус груза изменен на {self.get_status_display()}: {self.title}"
+                )
                 self.notify_users(recipients, message)
 
     def approve(self, manager: User, notes: str = None):
         """Approve cargo by manager"""
-        if manager.role != 'manager':
+        if manager.role != User.UserRole.MANAGER:
             raise ValueError("Only managers can approve cargos")
             
         self.status = self.CargoStatus.MANAGER_APPROVED
         self.approved_by = manager
         self.approval_notes = notes
         self.approval_date = timezone.now()
-        self.save()
+        self.save(update_fields=APPROVAL_UPDATE_FIELDS)
         
         # Notify owner about approval
         from core.services.telegram import telegram_service
@@ -496,18 +679,18 @@ class Cargo(models.Model):
             self,
             "Ваш груз был одобрен"
         )
-        self.notify_users([self.owner], message)
+        self.notify_users([self.owner_id], message)
 
     def reject(self, manager: User, notes: str = None):
         """Reject cargo by manager"""
-        if manager.role != 'manager':
+        if manager.role != User.UserRole.MANAGER:
             raise ValueError("Only managers can reject cargos")
             
         self.status = self.CargoStatus.REJECTED
         self.approved_by = manager
         self.approval_notes = notes
         self.approval_date = timezone.now()
-        self.save()
+        self.save(update_fields=APPROVAL_UPDATE_FIELDS)
         
         # Notify owner about rejection
         from core.services.telegram import telegram_service
@@ -515,33 +698,98 @@ class Cargo(models.Model):
             self,
             f"Ваш груз был отклонен\nПричина: {notes if notes else 'Не указана'}"
         )
-        self.notify_users([self.owner], message)
+        self.notify_users([self.owner_id], message)
 
 
     class Meta:
         ordering = ['-created_at']
+        # owner, assigned_to, managed_by and the location foreign keys
+        # are indexed by Django already
         indexes = [
-            models.Index(fields=['status']),
             models.Index(fields=['loading_date']),
-            models.Index(fields=['owner']),
-            models.Index(fields=['assigned_to']),
-            models.Index(fields=['managed_by']),
-            models.Index(fields=['source_type', 'source_id']),
             models.Index(fields=['vehicle_type']),
-            models.Index(fields=['loading_point']),
-            models.Index(fields=['unloading_point']),
+            # Status listings sorted by date (admin changelist, public search)
+            models.Index(fields=['status', '-created_at'], name='cargo_status_created_idx'),
+            models.Index(fields=['owner', 'status'], name='cargo_owner_status_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='cargo_assigned_status_idx'),
+            # Only cargos still in work, completed/cancelled/expired dominate the table
+            models.Index(
+                fields=['-created_at'],
+                name='cargo_active_created_idx',
+                condition=models.Q(status__in=[
+                    'pending', 'pending_approval', 'manager_approved',
+                    'assigned', 'in_progress'
+                ])
+            ),
+            # Status + loading_date lookups (matching, expiry) only touch open cargos
+            models.Index(
+                fields=['status', 'loading_date'],
+                name='cargo_active_sched_idx',
+                condition=models.Q(status__in=[
+                    'pending', 'pending_approval', 'manager_approved',
+                    'assigned', 'in_progress'
+                ])
+            ),
+            GinIndex(fields=['search_vector'], name='cargo_search_vector_idx'),
+            # Trigram indexes serve icontains (UPPER(col) LIKE '%...%') lookups
+            GinIndex(
+                OpClass(Upper('loading_point'), name='gin_trgm_ops'),
+                name='cargo_loading_trgm_idx'
+            ),
+            GinIndex(
+                OpClass(Upper('unloading_point'), name='gin_trgm_ops'),
+                name='cargo_unloading_trgm_idx'
+            ),
+        ]
+        constraints = [
+            # One cargo per external record; also the index for
+            # (source_type, source_id) lookups during ingestion.
+            # Blank ids don't identify a record and may repeat
+            models.UniqueConstraint(
+                fields=['source_type', 'source_id'],
+                condition=models.Q(source_id__isnull=False) & ~models.Q(source_id=''),
+                name='cargo_source_uniq'
+            ),
         ]
         
     def __str__(self):
         return f"{self.title} ({self.loading_point} - {self.unloading_point})"
     
     def increment_views(self):
-        """Increment the view counter"""
+        """
+        Count a view. Buffered in Redis and added to views_count by the
+        flush_cargo_views task, so the cargo row isn't updated per view.
+        """
+        from core.services.view_counter import record_cargo_view
+        record_cargo_view(self.pk)
+        # Keep the instance in step without re-reading the row
         self.views_count += 1
-        self.save(update_fields=['views_count'])
 
     
 
+class CargoRouteStop(models.Model):
+    """Intermediate point of a cargo route"""
+    cargo = models.ForeignKey(
+        Cargo,
+        on_delete=models.CASCADE,
+        related_name='route_stops'
+    )
+    location = models.ForeignKey(
+        'core.Location',
+        on_delete=models.CASCADE,
+        related_name='cargo_route_stops'
+    )
+    sequence = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['sequence']
+        indexes = [
+            models.Index(fields=['cargo', 'sequence'], name='cargo_route_stop_seq_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.cargo_id} #{self.sequence}: {self.location_id}"
+
 class CargoDocument(models.Model):
     """Model for storing cargo-related documents"""
     
@@ -568,6 +816,35 @@ class CargoDocument(models.Model):
     def __str__(self):
         return f"{self.cargo.title} - {self.type} - {self.title}"
 
+class CargoStatusHistoryQuerySet(models.QuerySet):
+    def bulk_create_with_notifications(self, objs, batch_size=None):
+        """
+        bulk_create history entries and queue the owner notifications
+        that save() would send, loading all cargos in one query
+        """
+        from core.services.notifications import queue_bulk_messages
+        
+        objs = self.bulk_create(objs, batch_size=batch_size)
+        cargos = {
+            pk: (title, owner_id)
+            for pk, title, owner_id in Cargo.objects.using(self.db).filter(
+                pk__in={entry.cargo_id for entry in objs}
+            ).values_list('pk', 'title', 'owner_id')
+        }
+        
+        # owner_id is the owner's telegram_id
+        messages = []
+        for entry in objs:
+            title, owner_id = cargos.get(entry.cargo_id, (None, None))
+            if owner_id:
+                messages.append({
+                    "telegram_id": owner_id,
+                    "message": entry.format_notification(title)
+                })
+        queue_bulk_messages(messages, using=self.db)
+        return objs
+
+
 class CargoStatusHistory(models.Model):
     """Model for tracking cargo status changes"""
     cargo = models.ForeignKey(
@@ -587,6 +864,8 @@ class CargoStatusHistory(models.Model):
     changed_at = models.DateTimeField(auto_now_add=True)
     comment = models.TextField(null=True, blank=True)
     
+    objects = CargoStatusHistoryQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-changed_at']
         verbose_name_plural = 'Cargo status histories'
@@ -594,6 +873,15 @@ class CargoStatusHistory(models.Model):
     def __str__(self):
         return f"{self.cargo.title} - {self.status} at {self.changed_at}"
     
+    def format_notification(self, cargo_title):
+        """Format the owner notification about this status change"""
+        return (
+            f"Cargo status updated to {self.get_status_display()}\n"
+            f"Cargo: {cargo_title}\n"
+            f"Changed by: {self.changed_by.get_full_name() if self.changed_by else 'System'}\n"
+            f"Comment: {self.comment if self.comment else 'No comment'}"
+        )
+
     def save(self, *args, **kwargs):
         """Override save to send notifications"""
         is_new = not self.pk
@@ -601,17 +889,20 @@ class CargoStatusHistory(models.Model):
         
         if is_new:
             # Send notification about status change
-            from core.services.telegram import telegram_service
-            message = (
-                f"Cargo status updated to {self.get_status_display()}\n"
-                f"Cargo: {self.cargo.title}\n"
-                f"Changed by: {self.changed_by.get_full_name() if self.changed_by else 'System'}\n"
-                f"Comment: {self.comment if self.comment else 'No comment'}"
-            )
+            from core.services.notifications import queue_bulk_messages
             
-            # Notify cargo owner
-            if self.cargo.owner.telegram_id:
-                telegram_service.send_message(
-                    self.cargo.owner.telegram_id,
-                    message
-                )
\ No newline at end of file
+            # Notify cargo owner (owner_id is the owner's telegram_id);
+            # read only the two needed columns unless cargo is already loaded
+            if self._meta.get_field('cargo').is_cached(self):
+                title, owner_id = self.cargo.title, self.cargo.owner_id
+            else:
+                title, owner_id = Cargo.objects.filter(
+                    pk=self.cargo_id
+                ).values_list('title', 'owner_id').first() or (None, None)
+            if owner_id:
+                # Queued in the outbox: no Telegram call inside the transaction,
+                # and nothing is sent if the status change rolls back
+                queue_bulk_messages([{
+                    "telegram_id": owner_id,
+                    "message": self.format_notification(title)
+                }])
\ No newline at end of file
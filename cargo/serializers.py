@@ -1,12 +1,76 @@
+import hashlib
+import hmac
+import logging
+from types import MappingProxyType
+
 from rest_framework import serializers
+from django.db import transaction
+from django.db.models import Prefetch
 from django.utils import timezone
 from .models import CargoStatusHistory
-from users.serializers import UserProfileSerializer
-from .models import Cargo, CarrierRequest, CargoDocument
+from users.serializers import (
+    CachedUserProfileSerializer,
+    UserProfileSerializer,
+    profile_prefetch_lookups
+)
+from .models import Cargo, CarrierRequest, CargoDocument, CargoRouteStop
 from vehicles.serializers import VehicleSerializer
 from django.conf import settings
-from core.serializers import LocationListSerializer, LocationDetailSerializer
-from core.models import Location
+from core.serializers import (
+    CachedLocationField,
+    LocationDetailSerializer,
+    LocationListSerializer
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _nested(path, lookups):
+    """Prefix a nested serializer's related lookups with the path to it"""
+    return tuple(f'{path}__{lookup}' for lookup in lookups)
+
+# Allowed status transitions, checked by the update serializers' validate_status.
+# Statuses missing here (e.g. pending_approval) allow no transitions
+CARRIER_REQUEST_TRANSITIONS = MappingProxyType({
+    'pending': frozenset({'cancelled'}),
+    'assigned': frozenset({'accepted', 'rejected'}),
+    'accepted': frozenset({'completed', 'cancelled'}),
+    'rejected': frozenset({'pending'}),  # Allow retry
+    'completed': frozenset(),  # No transitions from completed
+    'cancelled': frozenset({'pending'}),  # Allow reactivation
+})
+
+CARGO_TRANSITIONS = MappingProxyType({
+    'draft': frozenset({'pending', 'cancelled'}),
+    'pending': frozenset({'assigned', 'cancelled'}),
+    'assigned': frozenset({'in_progress', 'cancelled'}),
+    'in_progress': frozenset({'completed', 'cancelled'}),
+    'completed': frozenset(),  # No transitions from completed
+    'cancelled': frozenset({'draft'}),  # Allow reactivation
+    'expired': frozenset({'draft'}),  # Allow reactivation
+})
+
+# Statuses a manager may set through ManagerCargoUpdateSerializer
+MANAGER_UPDATE_STATUSES = frozenset({
+    Cargo.CargoStatus.MANAGER_APPROVED,
+    Cargo.CargoStatus.REJECTED,
+    Cargo.CargoStatus.PENDING,
+})
+
+class LocationPointsMixin:
+    """Fill loading/unloading_point from the chosen location when not given"""
+    LOCATION_POINT_FIELDS = (
+        ('loading_location', 'loading_point'),
+        ('unloading_location', 'unloading_point'),
+    )
+
+    def validate(self, data):
+        data = super().validate(data)
+        for location_field, point_field in self.LOCATION_POINT_FIELDS:
+            location = data.get(location_field)
+            if location and not data.get(point_field):
+                data[point_field] = location.name
+        return data
 
 class CargoApprovalSerializer(serializers.ModelSerializer):
     """Serializer for manager approval/rejection of cargo"""
@@ -26,13 +90,13 @@ class CargoApprovalSerializer(serializers.ModelSerializer):
 
 class ManagerCargoUpdateSerializer(serializers.ModelSerializer):
     """Serializer for managers to update cargo details"""
-    loading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    loading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
-    unloading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    unloading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
@@ -51,11 +115,7 @@ class ManagerCargoUpdateSerializer(serializers.ModelSerializer):
         ]
 
     def validate_status(self, value):
-        if value not in [
-            Cargo.CargoStatus.MANAGER_APPROVED,
-            Cargo.CargoStatus.REJECTED,
-            Cargo.CargoStatus.PENDING
-        ]:
+        if value not in MANAGER_UPDATE_STATUSES:
             raise serializers.ValidationError(
                 "Invalid status for manager update"
             )
@@ -74,13 +134,13 @@ class ExternalCargoCreateSerializer(serializers.ModelSerializer):
     api_key = serializers.CharField(write_only=True)
     source_type = serializers.ChoiceField(choices=Cargo.SourceType.choices)
     source_id = serializers.CharField(required=True)
-    loading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    loading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
-    unloading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    unloading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
@@ -107,7 +167,12 @@ class ExternalCargoCreateSerializer(serializers.ModelSerializer):
                 "API key validation is not configured"
             )
         
-        if value != valid_key:
+        # Constant-time comparison of fixed-size digests, so neither the key
+        # nor its length can be learned from response timings
+        if not hmac.compare_digest(
+            hashlib.sha256(str(value).encode('utf-8')).digest(),
+            hashlib.sha256(str(valid_key).encode('utf-8')).digest()
+        ):
             raise serializers.ValidationError("Invalid API key")
         
         return value
@@ -163,15 +228,28 @@ class CarrierRequestSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at', 'assigned_at']
 
-class CarrierRequestCreateSerializer(serializers.ModelSerializer):
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Join or prefetch every relation this serializer renders"""
+        return queryset.select_related(
+            'carrier', 'assigned_by',
+            *_nested('loading_location', LocationDetailSerializer.SELECT_RELATED),
+            *_nested('unloading_location', LocationDetailSerializer.SELECT_RELATED),
+            *_nested('vehicle', VehicleSerializer.SELECT_RELATED)
+        ).prefetch_related(
+            *profile_prefetch_lookups('carrier', 'assigned_by'),
+            *_nested('vehicle', VehicleSerializer.PREFETCH_RELATED)
+        )
+
+class CarrierRequestCreateSerializer(LocationPointsMixin, serializers.ModelSerializer):
     """Serializer for creating carrier requests"""
-    loading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    loading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
-    unloading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    unloading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
@@ -196,33 +274,21 @@ class CarrierRequestCreateSerializer(serializers.ModelSerializer):
 
     def validate_ready_date(self, value):
         """Validate ready date is not in the past"""
-        if value < timezone.now().date():
+        if value < (self.context.get('today') or timezone.localdate()):
             raise serializers.ValidationError(
                 "Ready date cannot be in the past"
             )
         return value
     
-    def validate(self, data):
-        """Validate location data"""
-        # Если указан loading_location, но не указан loading_point
-        if data.get('loading_location') and not data.get('loading_point'):
-            data['loading_point'] = data['loading_location'].name
-            
-        # Если указан unloading_location, но не указан unloading_point
-        if data.get('unloading_location') and not data.get('unloading_point'):
-            data['unloading_point'] = data['unloading_location'].name
-            
-        return data
-
-class CarrierRequestUpdateSerializer(serializers.ModelSerializer):
+class CarrierRequestUpdateSerializer(LocationPointsMixin, serializers.ModelSerializer):
     """Serializer for updating carrier requests"""
-    loading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    loading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
-    unloading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    unloading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
@@ -240,38 +306,17 @@ class CarrierRequestUpdateSerializer(serializers.ModelSerializer):
         """Validate status transitions"""
         instance = getattr(self, 'instance', None)
         if instance:
-            valid_transitions = {
-                'pending': ['cancelled'],
-                'assigned': ['accepted', 'rejected'],
-                'accepted': ['completed', 'cancelled'],
-                'rejected': ['pending'],  # Allow retry
-                'completed': [],  # No transitions from completed
-                'cancelled': ['pending'],  # Allow reactivation
-            }
-            
             current_status = instance.status
-            if value != current_status and value not in valid_transitions[current_status]:
+            if value != current_status and value not in CARRIER_REQUEST_TRANSITIONS.get(current_status, frozenset()):
                 raise serializers.ValidationError(
                     f"Cannot transition from {current_status} to {value}"
                 )
                 
         return value
     
-    def validate(self, data):
-        """Validate location data"""
-        # Если указан loading_location, но не указан loading_point
-        if data.get('loading_location') and not data.get('loading_point'):
-            data['loading_point'] = data['loading_location'].name
-            
-        # Если указан unloading_location, но не указан unloading_point
-        if data.get('unloading_location') and not data.get('unloading_point'):
-            data['unloading_point'] = data['unloading_location'].name
-            
-        return data
-
 class CarrierRequestListSerializer(serializers.ModelSerializer):
     """Simplified carrier request serializer for list views"""
-    carrier = UserProfileSerializer(read_only=True)
+    carrier = CachedUserProfileSerializer(read_only=True)
     vehicle = VehicleSerializer(read_only=True)
     loading_location = LocationListSerializer(read_only=True)
     unloading_location = LocationListSerializer(read_only=True)
@@ -287,6 +332,17 @@ class CarrierRequestListSerializer(serializers.ModelSerializer):
             'assigned_cargo', 'assigned_by', 'assigned_at'
         ]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Join or prefetch every relation this serializer renders"""
+        return queryset.select_related(
+            'carrier', 'loading_location', 'unloading_location',
+            *_nested('vehicle', VehicleSerializer.SELECT_RELATED)
+        ).prefetch_related(
+            *profile_prefetch_lookups('carrier'),
+            *_nested('vehicle', VehicleSerializer.PREFETCH_RELATED)
+        )
+
 class CargoSerializer(serializers.ModelSerializer):
     """Full cargo serializer with all details"""
     owner = UserProfileSerializer(read_only=True)
@@ -295,7 +351,9 @@ class CargoSerializer(serializers.ModelSerializer):
     carrier_requests = CarrierRequestListSerializer(many=True, read_only=True)
     loading_location = LocationDetailSerializer(read_only=True)
     unloading_location = LocationDetailSerializer(read_only=True)
-    additional_locations = LocationDetailSerializer(many=True, read_only=True)
+    additional_locations = LocationDetailSerializer(
+        source='route_locations', many=True, read_only=True
+    )
 
     class Meta:
         model = Cargo
@@ -317,15 +375,38 @@ class CargoSerializer(serializers.ModelSerializer):
             'carrier_requests'
         ]
 
-class CargoCreateSerializer(serializers.ModelSerializer):
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Join or prefetch every relation this serializer renders"""
+        return queryset.select_related(
+            'owner', 'assigned_to', 'managed_by',
+            *_nested('loading_location', LocationDetailSerializer.SELECT_RELATED),
+            *_nested('unloading_location', LocationDetailSerializer.SELECT_RELATED)
+        ).prefetch_related(
+            *profile_prefetch_lookups('owner', 'assigned_to', 'managed_by'),
+            Prefetch(
+                'route_stops',
+                queryset=CargoRouteStop.objects.select_related(
+                    *_nested('location', LocationDetailSerializer.SELECT_RELATED)
+                )
+            ),
+            Prefetch(
+                'carrier_requests',
+                queryset=CarrierRequestListSerializer.setup_eager_loading(
+                    CarrierRequest.objects.all()
+                )
+            )
+        )
+
+class CargoCreateSerializer(LocationPointsMixin, serializers.ModelSerializer):
     """Serializer for creating cargos"""
-    loading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    loading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
-    unloading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    unloading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
@@ -345,24 +426,12 @@ class CargoCreateSerializer(serializers.ModelSerializer):
 
     def validate_loading_date(self, value):
         """Validate that loading date is not in the past"""
-        if value < timezone.now().date():
+        if value < (self.context.get('today') or timezone.localdate()):
             raise serializers.ValidationError(
                 "Loading date cannot be in the past"
             )
         return value
     
-    def validate(self, data):
-        """Validate location data"""
-        # Если указан loading_location, но не указан loading_point
-        if data.get('loading_location') and not data.get('loading_point'):
-            data['loading_point'] = data['loading_location'].name
-            
-        # Если указан unloading_location, но не указан unloading_point
-        if data.get('unloading_location') and not data.get('unloading_point'):
-            data['unloading_point'] = data['unloading_location'].name
-            
-        return data
-    
     def create(self, validated_data):
         """Create cargo with appropriate initial status based on user role"""
         request = self.context.get('request')
@@ -386,22 +455,22 @@ class CargoCreateSerializer(serializers.ModelSerializer):
             validated_data['status'] = Cargo.CargoStatus.DRAFT
 
         # Create the cargo
-        print("creating cargo with data: ", validated_data)
+        logger.debug("creating cargo with data: %s", validated_data)
         cargo = Cargo.objects.create(
             # owner=user, 
             **validated_data)
         
         return cargo
     
-class CargoUpdateSerializer(serializers.ModelSerializer):
+class CargoUpdateSerializer(LocationPointsMixin, serializers.ModelSerializer):
     """Serializer for updating cargo"""
-    loading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    loading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
-    unloading_location = serializers.PrimaryKeyRelatedField(
-        queryset=Location.objects.filter(level=3),
+    unloading_location = CachedLocationField(
+        level=3,
         required=False,
         allow_null=True
     )
@@ -425,16 +494,6 @@ class CargoUpdateSerializer(serializers.ModelSerializer):
         instance = self.instance
         current_status = instance.status
 
-        valid_transitions = {
-            'draft': ['pending', 'cancelled'],
-            'pending': ['assigned', 'cancelled'],
-            'assigned': ['in_progress', 'cancelled'],
-            'in_progress': ['completed', 'cancelled'],
-            'completed': [],  # No transitions from completed
-            'cancelled': ['draft'],  # Allow reactivation
-            'expired': ['draft']  # Allow reactivation
-        }
-
         # Additional role-based validation
         if user.role == 'student':
             if current_status == 'pending' and value == 'assigned':
@@ -455,30 +514,18 @@ class CargoUpdateSerializer(serializers.ModelSerializer):
                     "Invalid status transition for carrier"
                 )
 
-        if value != current_status and value not in valid_transitions[current_status]:
+        if value != current_status and value not in CARGO_TRANSITIONS.get(current_status, frozenset()):
             raise serializers.ValidationError(
                 f"Cannot transition from {current_status} to {value}"
             )
 
         return value
     
-    def validate(self, data):
-        """Validate location data"""
-        # Если указан loading_location, но не указан loading_point
-        if data.get('loading_location') and not data.get('loading_point'):
-            data['loading_point'] = data['loading_location'].name
-            
-        # Если указан unloading_location, но не указан unloading_point
-        if data.get('unloading_location') and not data.get('unloading_point'):
-            data['unloading_point'] = data['unloading_location'].name
-            
-        return data
-
 class CargoListSerializer(serializers.ModelSerializer):
     """Simplified cargo serializer for list views"""
-    owner = UserProfileSerializer(read_only=True)
-    assigned_to = UserProfileSerializer(read_only=True)
-    managed_by = UserProfileSerializer(read_only=True)
+    owner = CachedUserProfileSerializer(read_only=True)
+    assigned_to = CachedUserProfileSerializer(read_only=True)
+    managed_by = CachedUserProfileSerializer(read_only=True)
     loading_location = LocationListSerializer(read_only=True)
     unloading_location = LocationListSerializer(read_only=True)
 
@@ -500,6 +547,49 @@ class CargoListSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'views_count'
         ]
 
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        """Join or prefetch every relation this serializer renders"""
+        return queryset.select_related(
+            'owner', 'assigned_to', 'managed_by',
+            'loading_location', 'unloading_location'
+        ).prefetch_related(
+            *profile_prefetch_lookups('owner', 'assigned_to', 'managed_by')
+        )
+
+# Columns read by CargoCompactSerializer, for Cargo.objects.values()
+CARGO_COMPACT_VALUES = (
+    'id', 'title', 'status', 'weight',
+    'loading_point', 'unloading_point', 'loading_date',
+    'loading_location_id', 'loading_location__name',
+    'unloading_location_id', 'unloading_location__name',
+    'vehicle_type', 'payment_method', 'price',
+    'owner_id', 'owner__first_name', 'owner__last_name',
+    'assigned_to_id', 'created_at',
+)
+
+class CargoCompactSerializer(serializers.Serializer):
+    """Flat read-only cargo row built from a values() dict, no model instances"""
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    status = serializers.CharField()
+    weight = serializers.DecimalField(max_digits=10, decimal_places=2)
+    loading_point = serializers.CharField()
+    unloading_point = serializers.CharField()
+    loading_date = serializers.DateField()
+    loading_location = serializers.IntegerField(source='loading_location_id', allow_null=True)
+    loading_location_name = serializers.CharField(source='loading_location__name', allow_null=True)
+    unloading_location = serializers.IntegerField(source='unloading_location_id', allow_null=True)
+    unloading_location_name = serializers.CharField(source='unloading_location__name', allow_null=True)
+    vehicle_type = serializers.CharField()
+    payment_method = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, allow_null=True)
+    owner = serializers.CharField(source='owner_id')
+    owner_first_name = serializers.CharField(source='owner__first_name')
+    owner_last_name = serializers.CharField(source='owner__last_name')
+    assigned_to = serializers.CharField(source='assigned_to_id', allow_null=True)
+    created_at = serializers.DateTimeField()
+
 class CargoAssignmentSerializer(serializers.ModelSerializer):
     """Serializer for assigning cargo to carrier"""
     carrier_request = serializers.PrimaryKeyRelatedField(
@@ -516,7 +606,7 @@ class CargoAssignmentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Can only assign pending carrier requests"
             )
-        if value.assigned_cargo:
+        if value.assigned_cargo_id:
             raise serializers.ValidationError(
                 "Carrier request already assigned to another cargo"
             )
@@ -527,18 +617,26 @@ class CargoAssignmentSerializer(serializers.ModelSerializer):
         carrier_request = validated_data['carrier_request']
         user = self.context['request'].user
 
-        # Update cargo
-        instance.status = 'assigned'
-        instance.assigned_to = carrier_request.carrier
-        instance.managed_by = user
-        instance.save()
-
-        # Update carrier request
-        carrier_request.status = 'assigned'
-        carrier_request.assigned_cargo = instance
-        carrier_request.assigned_by = user
-        carrier_request.assigned_at = timezone.now()
-        carrier_request.save()
+        # Both rows change together or not at all; save() is kept (with
+        # update_fields) so status notifications still fire
+        with transaction.atomic():
+            # Update cargo
+            instance.status = 'assigned'
+            instance.assigned_to = carrier_request.carrier
+            instance.managed_by = user
+            instance.save(update_fields=[
+                'status', 'assigned_to', 'managed_by', 'updated_at'
+            ])
+
+            # Update carrier request
+            carrier_request.status = 'assigned'
+            carrier_request.assigned_cargo = instance
+            carrier_request.assigned_by = user
+            carrier_request.assigned_at = timezone.now()
+            carrier_request.save(update_fields=[
+                'status', 'assigned_cargo', 'assigned_by',
+                'assigned_at', 'updated_at'
+            ])
 
         return instance
 
@@ -569,7 +667,12 @@ class CargoAcceptanceSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """Process cargo acceptance/rejection"""
         decision = validated_data['decision']
-        carrier_request = instance.carrier_requests.filter(status='assigned').first()
+        assigned = getattr(instance, 'assigned_carrier_requests', None)
+        if assigned is None:
+            carrier_request = instance.carrier_requests.filter(status='assigned').first()
+        else:
+            # Prefetched by CargoViewSet.get_queryset
+            carrier_request = assigned[0] if assigned else None
 
         if decision == 'accept':
             instance.status = 'in_progress'
@@ -582,12 +685,33 @@ class CargoAcceptanceSerializer(serializers.ModelSerializer):
                 carrier_request.status = 'rejected'
                 carrier_request.assigned_cargo = None
 
-        instance.save()
-        if carrier_request:
-            carrier_request.save()
+        # Only the changed columns, both rows or neither
+        with transaction.atomic():
+            instance.save(update_fields=['status', 'assigned_to', 'updated_at'])
+            if carrier_request:
+                carrier_request.save(update_fields=['status', 'assigned_cargo', 'updated_at'])
 
         return instance
 
+class FastMultipleChoiceField(serializers.MultipleChoiceField):
+    """MultipleChoiceField that checks the whole input against a frozenset of choices"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._choice_set = frozenset(self.choice_strings_to_values)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        values = {str(item) for item in data}
+        if not values.issubset(self._choice_set):
+            self.fail('invalid_choice', input=min(values - self._choice_set))
+        return values
+
+
 class CargoSearchSerializer(serializers.Serializer):
     """Serializer for cargo search parameters"""
     q = serializers.CharField(required=False, allow_blank=True)
@@ -607,15 +731,15 @@ class CargoSearchSerializer(serializers.Serializer):
     )
     date_from = serializers.DateField(required=False)
     date_to = serializers.DateField(required=False)
-    vehicle_types = serializers.MultipleChoiceField(
+    vehicle_types = FastMultipleChoiceField(
         required=False,
         choices=Cargo.VehicleType.choices
     )
-    loading_types = serializers.MultipleChoiceField(
+    loading_types = FastMultipleChoiceField(
         required=False,
         choices=Cargo.LoadingType.choices
     )
-    payment_methods = serializers.MultipleChoiceField(
+    payment_methods = FastMultipleChoiceField(
         required=False,
         choices=Cargo.PaymentMethod.choices
     )
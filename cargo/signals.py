@@ -1,197 +1,125 @@
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from django.contrib.auth import get_user_model
+from functools import partial
+
 from .models import Cargo, CarrierRequest
+from .tasks import notify_cargo_change, notify_carrier_request_change
 from core.services.telegram import telegram_service
 from django.db import transaction
 
-User = get_user_model()
+# New cargos in these statuses are broadcast to managers/students
+CREATED_BROADCAST_STATUSES = frozenset({
+    Cargo.CargoStatus.PENDING_APPROVAL,
+    Cargo.CargoStatus.PENDING,
+})
+
+
+def has_cargo_change_recipients(instance, created):
+    """Whether notify_cargo_change would notify anyone, checked without queries"""
+    if created:
+        return instance.status in CREATED_BROADCAST_STATUSES
+    return bool(
+        instance.owner_id
+        or instance.managed_by_id
+        or (instance.status == Cargo.CargoStatus.ASSIGNED and instance.assigned_to_id)
+        or instance.status == Cargo.CargoStatus.MANAGER_APPROVED
+    )
 
-@receiver(post_save, sender=Cargo)
+@receiver(post_save, sender=Cargo, dispatch_uid='cargo.notify_cargo_changes')
 def notify_cargo_changes(sender, instance, created, **kwargs):
     """Send notifications for cargo creation and changes"""
-    # Skip if this is not a change or the transaction is being managed elsewhere
-    if transaction.get_connection().in_atomic_block and not created:
+    old_status = getattr(instance, '_original_status', instance.status)
+    if not created and old_status == instance.status:
         return
-        
-    # Determine action and recipients based on status and event
-    if created:
-        action = f"Новый груз создан: {instance.title}"
-        
-        # Notify different users based on cargo status
-        if instance.status == Cargo.CargoStatus.PENDING_APPROVAL:
-            # Notify managers about new cargo requiring approval
-            managers = User.objects.filter(role='manager', is_active=True)
-            if managers.exists():
-                for manager in managers:
-                    if manager.telegram_id:
-                        telegram_service.send_notification.delay(
-                            manager.telegram_id,
-                            telegram_service.format_cargo_notification(instance, action)
-                        )
-            
-        elif instance.status == Cargo.CargoStatus.PENDING:
-            # Notify students about new cargo
-            students = User.objects.filter(role='student', is_active=True)
-            if students.exists():
-                for student in students:
-                    if student.telegram_id:
-                        telegram_service.send_notification.delay(
-                            student.telegram_id, 
-                            telegram_service.format_cargo_notification(instance, action)
-                        )
-            
-    elif hasattr(instance, '_original_status') and instance._original_status != instance.status:
-        old_status = instance._original_status
-        new_status = instance.status
-        
-        action = f"Статус груза изменен с {old_status} на {new_status}: {instance.title}"
-        
-        # Notify owner
-        if instance.owner and instance.owner.telegram_id:
-            telegram_service.send_notification.delay(
-                instance.owner.telegram_id,
-                telegram_service.format_cargo_notification(instance, action)
-            )
-            
-        # Notify assigned carrier if status becomes assigned
-        if new_status == Cargo.CargoStatus.ASSIGNED and instance.assigned_to and instance.assigned_to.telegram_id:
-            telegram_service.send_notification.delay(
-                instance.assigned_to.telegram_id,
-                telegram_service.format_cargo_notification(instance, "Вам назначен груз")
-            )
-            
-        # Notify managing student about status changes
-        if instance.managed_by and instance.managed_by.telegram_id:
-            telegram_service.send_notification.delay(
-                instance.managed_by.telegram_id,
-                telegram_service.format_cargo_notification(instance, action)
-            )
-            
-        # Notify all students when cargo becomes manager_approved
-        if new_status == Cargo.CargoStatus.MANAGER_APPROVED:
-            students = User.objects.filter(role='student', is_active=True)
-            if students.exists():
-                for student in students:
-                    if student.telegram_id:
-                        telegram_service.send_notification.delay(
-                            student.telegram_id,
-                            telegram_service.format_cargo_notification(instance, "Новый груз доступен")
-                        )
+    if not has_cargo_change_recipients(instance, created):
+        return
+    
+    # Recipients and messages are built by a Celery task after commit,
+    # outside the caller's transaction and request
+    transaction.on_commit(partial(
+        notify_cargo_change.delay,
+        instance.pk, created, old_status, instance.status
+    ))
 
-@receiver(pre_save, sender=Cargo)
+@receiver(pre_save, sender=Cargo, dispatch_uid='cargo.store_original_status')
 def store_original_status(sender, instance, **kwargs):
     """Store original status before save for comparison in post_save"""
-    if instance.pk:
-        try:
-            instance._original_status = Cargo.objects.get(pk=instance.pk).status
-        except Cargo.DoesNotExist:
-            instance._original_status = None
-    else:
-        instance._original_status = None
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'status' not in update_fields:
+        # Status isn't written by this save, nothing to compare
+        instance._original_status = instance.status
+        return
+    # Snapshot taken when the instance was loaded, no extra query
+    instance._original_status = instance.get_loaded_status()
 
-@receiver(post_delete, sender=Cargo)
+@receiver(post_delete, sender=Cargo, dispatch_uid='cargo.notify_cargo_deletion')
 def notify_cargo_deletion(sender, instance, **kwargs):
     """Send notifications when cargo is deleted"""
+    # Queued after commit, nothing is sent if the delete rolls back.
+    # FK values are the users' telegram IDs, the users aren't loaded
     action = f"Груз удален: {instance.title}"
+    message = telegram_service.format_cargo_notification(instance, action)
     
     # Notify owner
-    if instance.owner and instance.owner.telegram_id:
-        telegram_service.send_notification.delay(
-            instance.owner.telegram_id, 
-            telegram_service.format_cargo_notification(instance, action)
-        )
+    if instance.owner_id:
+        transaction.on_commit(partial(telegram_service.send_notification.delay, instance.owner_id, message))
     
     # Notify carrier if assigned
-    if instance.assigned_to and instance.assigned_to.telegram_id:
-        telegram_service.send_notification.delay(
-            instance.assigned_to.telegram_id,
-            telegram_service.format_cargo_notification(instance, action)
-        )
+    if instance.assigned_to_id:
+        transaction.on_commit(partial(telegram_service.send_notification.delay, instance.assigned_to_id, message))
     
     # Notify managing student
-    if instance.managed_by and instance.managed_by.telegram_id:
-        telegram_service.send_notification.delay(
-            instance.managed_by.telegram_id,
-            telegram_service.format_cargo_notification(instance, action)
-        )
+    if instance.managed_by_id:
+        transaction.on_commit(partial(telegram_service.send_notification.delay, instance.managed_by_id, message))
 
-@receiver(post_save, sender=CarrierRequest)
+@receiver(post_save, sender=CarrierRequest, dispatch_uid='cargo.notify_carrier_request_changes')
 def notify_carrier_request_changes(sender, instance, created, **kwargs):
     """Send notifications for carrier request creation and changes"""
-    if created:
-        action = "Новая заявка от перевозчика"
-        
-        # Notify students about new carrier request
-        students = User.objects.filter(role='student', is_active=True)
-        if students.exists():
-            for student in students:
-                if student.telegram_id:
-                    telegram_service.send_notification.delay(
-                        student.telegram_id,
-                        telegram_service.format_carrier_notification(instance, action)
-                    )
-            
-    elif hasattr(instance, '_original_status') and instance._original_status != instance.status:
-        old_status = instance._original_status
-        new_status = instance.status
-        
-        action = f"Статус заявки изменен с {old_status} на {new_status}"
-        
-        # Notify carrier about status changes
-        if instance.carrier and instance.carrier.telegram_id:
-            telegram_service.send_notification.delay(
-                instance.carrier.telegram_id,
-                telegram_service.format_carrier_notification(instance, action)
-            )
-            
-        # Notify assigning student if request was assigned
-        if instance.assigned_by and instance.assigned_by.telegram_id:
-            telegram_service.send_notification.delay(
-                instance.assigned_by.telegram_id,
-                telegram_service.format_carrier_notification(instance, action)
-            )
-                
-        # Notify cargo owner if request was accepted
-        if new_status == CarrierRequest.RequestStatus.ACCEPTED and instance.assigned_cargo and instance.assigned_cargo.owner and instance.assigned_cargo.owner.telegram_id:
-            telegram_service.send_notification.delay(
-                instance.assigned_cargo.owner.telegram_id,
-                telegram_service.format_carrier_notification(instance, "Перевозчик принял вашу заявку")
-            )
+    old_status = getattr(instance, '_original_status', instance.status)
+    if not created and old_status == instance.status:
+        return
+    
+    # Built and sent by a Celery task after commit
+    transaction.on_commit(partial(
+        notify_carrier_request_change.delay,
+        instance.pk, created, old_status, instance.status
+    ))
 
-@receiver(pre_save, sender=CarrierRequest)
+@receiver(pre_save, sender=CarrierRequest, dispatch_uid='cargo.store_carrier_request_original_status')
 def store_carrier_request_original_status(sender, instance, **kwargs):
     """Store original status before save for comparison in post_save"""
-    if instance.pk:
-        try:
-            instance._original_status = CarrierRequest.objects.get(pk=instance.pk).status
-        except CarrierRequest.DoesNotExist:
-            instance._original_status = None
-    else:
-        instance._original_status = None
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'status' not in update_fields:
+        # Status isn't written by this save, nothing to compare
+        instance._original_status = instance.status
+        return
+    # Snapshot taken when the instance was loaded, no extra query
+    instance._original_status = instance.get_loaded_status()
 
-@receiver(post_delete, sender=CarrierRequest)
+@receiver(post_delete, sender=CarrierRequest, dispatch_uid='cargo.notify_carrier_request_deletion')
 def notify_carrier_request_deletion(sender, instance, **kwargs):
     """Send notifications when carrier request is deleted"""
+    # Queued after commit, nothing is sent if the delete rolls back.
+    # FK values are the users' telegram IDs, the users aren't loaded
     action = f"Заявка перевозчика удалена"
+    message = telegram_service.format_carrier_notification(instance, action)
     
     # Notify carrier
-    if instance.carrier and instance.carrier.telegram_id:
-        telegram_service.send_notification.delay(
-            instance.carrier.telegram_id,
-            telegram_service.format_carrier_notification(instance, action)
-        )
+    if instance.carrier_id:
+        transaction.on_commit(partial(telegram_service.send_notification.delay, instance.carrier_id, message))
     
     # Notify assigning student
-    if instance.assigned_by and instance.assigned_by.telegram_id:
-        telegram_service.send_notification.delay(
-            instance.assigned_by.telegram_id,
-            telegram_service.format_carrier_notification(instance, action)
-        )
+    if instance.assigned_by_id:
+        transaction.on_commit(partial(telegram_service.send_notification.delay, instance.assigned_by_id, message))
     
     # Notify cargo owner if request was assigned to a cargo
-    if instance.assigned_cargo and instance.assigned_cargo.owner and instance.assigned_cargo.owner.telegram_id:
-        telegram_service.send_notification.delay(
-            instance.assigned_cargo.owner.telegram_id,
-            telegram_service.format_carrier_notification(instance, action)
-        )
\ No newline at end of file
+    cargo_owner_id = None
+    if instance.assigned_cargo_id:
+        if CarrierRequest.assigned_cargo.is_cached(instance):
+            cargo_owner_id = instance.assigned_cargo.owner_id
+        else:
+            cargo_owner_id = Cargo.objects.filter(
+                pk=instance.assigned_cargo_id
+            ).values_list('owner_id', flat=True).first()
+    if cargo_owner_id:
+        transaction.on_commit(partial(telegram_service.send_notification.delay, cargo_owner_id, message))
\ No newline at end of file
@@ -0,0 +1,102 @@
+from celery import shared_task
+
+from core.services.telegram import telegram_service
+from .models import Cargo, CarrierRequest
+
+
+@shared_task
+def notify_cargo_change(cargo_id, created, old_status, new_status):
+    """
+    Send notifications for cargo creation or a status change.
+    Queued by the post_save handler once the transaction commits
+    """
+    # User pk is the telegram id, so the FK columns are the recipients
+    # and the users themselves aren't loaded
+    cargo = Cargo.objects.defer('search_vector').filter(pk=cargo_id).first()
+    if cargo is None:
+        return
+    
+    # Determine action and recipients based on status and event
+    if created:
+        action = f"Новый груз создан: {cargo.title}"
+        # The message doesn't depend on the recipient, format it once
+        message = telegram_service.format_cargo_notification(cargo, action)
+        
+        # Notify different users based on cargo status
+        if new_status == Cargo.CargoStatus.PENDING_APPROVAL:
+            # Notify managers about new cargo requiring approval
+            telegram_service.send_broadcast_notification.delay('manager', message)
+            
+        elif new_status == Cargo.CargoStatus.PENDING:
+            # Notify students about new cargo
+            telegram_service.send_broadcast_notification.delay('student', message)
+            
+    else:
+        action = f"Статус груза изменен с {old_status} на {new_status}: {cargo.title}"
+        message = telegram_service.format_cargo_notification(cargo, action)
+        
+        # Notify owner
+        if cargo.owner_id:
+            telegram_service.send_notification.delay(cargo.owner_id, message)
+            
+        # Notify assigned carrier if status becomes assigned
+        if new_status == Cargo.CargoStatus.ASSIGNED and cargo.assigned_to_id:
+            telegram_service.send_notification.delay(
+                cargo.assigned_to_id,
+                telegram_service.format_cargo_notification(cargo, "Вам назначен груз")
+            )
+            
+        # Notify managing student about status changes
+        if cargo.managed_by_id:
+            telegram_service.send_notification.delay(cargo.managed_by_id, message)
+            
+        # Notify all students when cargo becomes manager_approved
+        if new_status == Cargo.CargoStatus.MANAGER_APPROVED:
+            approved_message = telegram_service.format_cargo_notification(cargo, "Новый груз доступен")
+            telegram_service.send_broadcast_notification.delay('student', approved_message)
+
+
+@shared_task
+def notify_carrier_request_change(carrier_request_id, created, old_status, new_status):
+    """
+    Send notifications for carrier request creation or a status change.
+    Queued by the post_save handler once the transaction commits
+    """
+    # carrier and vehicle are read by the formatter; recipients come from
+    # the FK columns, which hold the users' telegram IDs
+    carrier_request = CarrierRequest.objects.select_related(
+        'carrier', 'vehicle'
+    ).filter(pk=carrier_request_id).first()
+    if carrier_request is None:
+        return
+    
+    if created:
+        action = "Новая заявка от перевозчика"
+        message = telegram_service.format_carrier_notification(carrier_request, action)
+        
+        # Notify students about new carrier request
+        telegram_service.send_broadcast_notification.delay('student', message)
+            
+    else:
+        action = f"Статус заявки изменен с {old_status} на {new_status}"
+        message = telegram_service.format_carrier_notification(carrier_request, action)
+        
+        # Notify carrier about status changes
+        if carrier_request.carrier_id:
+            telegram_service.send_notification.delay(carrier_request.carrier_id, message)
+            
+        # Notify assigning student if request was assigned
+        if carrier_request.assigned_by_id:
+            telegram_service.send_notification.delay(carrier_request.assigned_by_id, message)
+                
+        # Notify cargo owner if request was accepted
+        cargo_owner_id = None
+        if new_status == CarrierRequest.RequestStatus.ACCEPTED and carrier_request.assigned_cargo_id:
+            cargo_owner_id = Cargo.objects.filter(
+                pk=carrier_request.assigned_cargo_id
+            ).values_list('owner_id', flat=True).first()
+        if cargo_owner_id:
+            telegram_service.send_notification.delay(
+                cargo_owner_id,
+                telegram_service.format_carrier_notification(carrier_request, "Перевозчик принял вашу заявку")
+            )
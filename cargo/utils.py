@@ -0,0 +1,33 @@
+from .models import Cargo
+
+# Rows fetched per keyset page
+ITER_CHUNK_SIZE = 2000
+
+
+def iter_cargo_chunks(queryset=None, chunk_size=ITER_CHUNK_SIZE, **filters):
+    """
+    Yield lists of cargos ordered by pk, one keyset page at a time
+    (WHERE id > last_id ORDER BY id LIMIT n). Unlike OFFSET paging every
+    page costs the same, and only one page is held in memory.
+    Safe for jobs that change the rows they iterate over.
+    """
+    if queryset is None:
+        queryset = Cargo.objects.all()
+    queryset = queryset.filter(**filters).order_by('pk')
+
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_pk = chunk[-1].pk
+
+
+def iter_cargos(queryset=None, chunk_size=ITER_CHUNK_SIZE, **filters):
+    """Yield cargos one by one, see iter_cargo_chunks"""
+    for chunk in iter_cargo_chunks(queryset, chunk_size, **filters):
+        yield from chunk
@@ -3,7 +3,7 @@ from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 from drf_spectacular.utils import extend_schema, OpenApiParameter
@@ -13,6 +13,8 @@ from .models import Cargo, CarrierRequest, CargoDocument
 from .serializers import (
     CargoSerializer,
     CargoListSerializer,
+    CargoCompactSerializer,
+    CARGO_COMPACT_VALUES,
     CargoCreateSerializer,
     CargoUpdateSerializer,
     CargoAssignmentSerializer,
@@ -36,6 +38,7 @@ from core.permissions import (
     IsCargoOwner
 )
 import hashlib
+import hmac
 from drf_spectacular.types import OpenApiTypes
 from django.conf import settings
 from rest_framework.permissions import AllowAny
@@ -53,7 +56,7 @@ class ManagerCargoViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filter queryset to show relevant cargos for managers"""
-        return Cargo.objects.filter(
+        return Cargo.objects.defer('search_vector').filter(
             Q(status=Cargo.CargoStatus.PENDING_APPROVAL) |
             Q(approved_by=self.request.user) |
             Q(status=Cargo.CargoStatus.MANAGER_APPROVED)
@@ -167,7 +170,7 @@ class ExternalCargoViewSet(viewsets.GenericViewSet):
                 (private_key + api_key + str(created_at)).encode()
             ).hexdigest()
             
-            if calculated_hash != received_hash:
+            if not hmac.compare_digest(calculated_hash, str(received_hash)):
                 return Response(
                     {'error': 'Invalid authentication'},
                     status=status.HTTP_401_UNAUTHORIZED
@@ -186,10 +189,22 @@ class ExternalCargoViewSet(viewsets.GenericViewSet):
                     if 'source_type' not in cleaned_data:
                         cleaned_data['source_type'] = 'api'
                     
-                    cargo = Cargo.objects.create(
-                        status='pending',  # Use string to match choices
-                        **cleaned_data
-                    )
+                    source_id = cleaned_data.get('source_id')
+                    if source_id is not None and str(source_id).strip():
+                        # Re-sent orders update their cargo instead of
+                        # duplicating it (cargo_source_uniq)
+                        cargo, _ = Cargo.objects.update_or_create(
+                            source_type=cleaned_data.pop('source_type'),
+                            source_id=cleaned_data.pop('source_id'),
+                            defaults=cleaned_data,
+                            create_defaults={**cleaned_data, 'status': 'pending'}
+                        )
+                    else:
+                        # No usable id to match on, source_id is stored as sent
+                        cargo = Cargo.objects.create(
+                            status='pending',  # Use string to match choices
+                            **cleaned_data
+                        )
                     
                     created_cargos.append({
                         'id': cargo.id,
@@ -261,12 +276,22 @@ class CarrierRequestViewSet(viewsets.ModelViewSet):
     ]
     ordering_fields = ['created_at', 'ready_date']
     ordering = ['-created_at']
+    # Actions that render carrier requests from get_queryset(); the others
+    # (destroy, matching_cargos) only need the rows themselves
+    EAGER_LOADING_ACTIONS = frozenset({
+        'list', 'retrieve', 'create', 'update', 'partial_update'
+    })
     
     def get_queryset(self):
         """Filter queryset based on user role"""
         queryset = super().get_queryset()
         user = self.request.user
 
+        if self.action in self.EAGER_LOADING_ACTIONS:
+            serializer_class = self.get_serializer_class()
+            if hasattr(serializer_class, 'setup_eager_loading'):
+                queryset = serializer_class.setup_eager_loading(queryset)
+
         if user.role == 'carrier':
             return queryset.filter(carrier=user)
         elif user.role == 'student':
@@ -276,6 +301,12 @@ class CarrierRequestViewSet(viewsets.ModelViewSet):
             
         return queryset.none()
     
+    def get_serializer_context(self):
+        """Add the request date, shared by all date validators"""
+        context = super().get_serializer_context()
+        context['today'] = timezone.localdate()
+        return context
+
     def get_serializer_class(self):
         """Return appropriate serializer class"""
         if self.action == 'create':
@@ -300,19 +331,21 @@ class CarrierRequestViewSet(viewsets.ModelViewSet):
         carrier_request = self.get_object()
         
         # Filter cargos based on matching criteria
-        matching_cargos = Cargo.objects.filter(
+        matching_cargos = Cargo.objects.defer('search_vector').filter(
             status='pending',
             loading_date__gte=carrier_request.ready_date,
             loading_point__icontains=carrier_request.loading_point,
             unloading_point__icontains=carrier_request.unloading_point
         )
         
+        matching_cargos = CargoListSerializer.setup_eager_loading(matching_cargos)
         serializer = CargoListSerializer(matching_cargos, many=True)
         return Response(serializer.data)
 
 class CargoViewSet(viewsets.ModelViewSet):
     """ViewSet for cargo management"""
-    queryset = Cargo.objects.all()
+    # search_vector is only read by Postgres full-text lookups, never serialized
+    queryset = Cargo.objects.defer('search_vector')
     serializer_class = CargoSerializer
     permission_classes = [IsVerifiedUser]
     filter_backends = [
@@ -330,12 +363,31 @@ class CargoViewSet(viewsets.ModelViewSet):
         'price', 'views_count'
     ]
     ordering = ['-created_at']
+    # Actions that render cargos from get_queryset(); the others (destroy,
+    # increment_views, statistics, matching_carriers) only need the rows
+    EAGER_LOADING_ACTIONS = frozenset({
+        'list', 'retrieve', 'search', 'create', 'update', 'partial_update'
+    })
     
     def get_queryset(self):
         """Filter queryset based on user role"""
         queryset = super().get_queryset()
         user = self.request.user
 
+        serializer_class = self.get_serializer_class()
+        if self.action in self.EAGER_LOADING_ACTIONS and hasattr(serializer_class, 'setup_eager_loading'):
+            # Relations rendered by the serializer, loaded a page at a time
+            queryset = serializer_class.setup_eager_loading(queryset)
+        elif self.action == 'accept_assignment':
+            # CargoAcceptanceSerializer.update reads the assigned request
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'carrier_requests',
+                    queryset=CarrierRequest.objects.filter(status='assigned'),
+                    to_attr='assigned_carrier_requests'
+                )
+            )
+
         if user.role == 'carrier':
             # Carriers see pending and assigned cargos
             return queryset.filter(
@@ -380,14 +432,23 @@ class CargoViewSet(viewsets.ModelViewSet):
             
         return queryset.none()
     
+    def get_serializer_context(self):
+        """Add the request date, shared by all date validators"""
+        context = super().get_serializer_context()
+        context['today'] = timezone.localdate()
+        return context
+
     def get_serializer_class(self):
         """Return appropriate serializer class"""
         if self.action == 'create':
             return CargoCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return CargoUpdateSerializer
-        elif self.action == 'list':
+        elif self.action in ['list', 'search']:
+            # Collections render without nested carrier_requests
             return CargoListSerializer
+        elif self.action == 'compact':
+            return CargoCompactSerializer
         elif self.action == 'assign_carrier':
             return CargoAssignmentSerializer
         elif self.action == 'accept_assignment':
@@ -407,6 +468,21 @@ class CargoViewSet(viewsets.ModelViewSet):
             permission_classes = [IsVerifiedUser]
         return [permission() for permission in permission_classes]
 
+    @extend_schema(
+        description='Flat cargo list without nested objects, for large listings',
+        responses={200: CargoCompactSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'])
+    def compact(self, request):
+        """List cargos as plain rows read with values()"""
+        queryset = self.filter_queryset(self.get_queryset()).values(*CARGO_COMPACT_VALUES)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = CargoCompactSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = CargoCompactSerializer(queryset, many=True)
+        return Response(serializer.data)
+
     @extend_schema(
         description='Get matching carrier requests for cargo',
         responses={200: CarrierRequestListSerializer(many=True)}
@@ -424,6 +500,7 @@ class CargoViewSet(viewsets.ModelViewSet):
             unloading_point__icontains=cargo.unloading_point
         )
         
+        matching_requests = CarrierRequestListSerializer.setup_eager_loading(matching_requests)
         serializer = CarrierRequestListSerializer(matching_requests, many=True)
         return Response(serializer.data)
 
@@ -547,8 +624,7 @@ class CargoViewSet(viewsets.ModelViewSet):
     def increment_views(self, request, pk=None):
         """Increment cargo view counter"""
         cargo = self.get_object()
-        cargo.views_count += 1
-        cargo.save(update_fields=['views_count'])
+        cargo.increment_views()
         return Response({'status': 'view count updated'})
 
     @extend_schema(
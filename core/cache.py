@@ -1,8 +1,11 @@
+import numpy as np
 from django.core.cache import cache
 from django.conf import settings
+from users.models import User
 from .models import Location
 
 CACHE_TTL = getattr(settings, 'LOCATION_CACHE_TTL', 60 * 60 * 24)  # 24 hours
+ROLE_RECIPIENTS_TTL = 60  # Short: covers users that change without signals (e.g. .update())
 
 def get_cached_countries():
     """Get list of countries from cache or database"""
@@ -48,19 +51,82 @@ def get_cached_cities(parent_id, is_state=True):
     
     return cities
 
+def get_cached_coordinates(level=3):
+    """
+    Get coordinates of all locations of a level from cache or database.
+    Returns (ids, latitudes, longitudes, cos_latitudes) NumPy arrays,
+    coordinates in radians
+    """
+    key = f'location_coords_{level}'
+    coordinates = cache.get(key)
+    
+    if coordinates is None:
+        rows = list(Location.objects.filter(
+            level=level,
+            latitude__isnull=False,
+            longitude__isnull=False
+        ).values_list('id', 'latitude', 'longitude'))
+        ids, latitudes, longitudes = zip(*rows) if rows else ((), (), ())
+        latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+        coordinates = (
+            np.asarray(ids, dtype=np.int64),
+            latitudes,
+            np.radians(np.asarray(longitudes, dtype=np.float64)),
+            np.cos(latitudes),
+        )
+        cache.set(key, coordinates, CACHE_TTL)
+    
+    return coordinates
+
+def get_cached_location(location_id):
+    """Get a single location from cache or database, None if it doesn't exist"""
+    key = f'location_{location_id}'
+    location = cache.get(key)
+    
+    if location is None:
+        location = Location.objects.filter(id=location_id).first()
+        if location is not None:
+            cache.set(key, location, CACHE_TTL)
+    
+    return location
+
+def invalidate_location(location):
+    """Invalidate caches that include the given location"""
+    cache.delete(f'location_{location.id}')
+    if location.level == 1:  # Country
+        cache.delete('location_countries')
+        cache.delete(f'location_states_{location.id}')
+        cache.delete(f'location_cities_{location.id}')
+    elif location.level == 2:  # State
+        cache.delete(f'location_states_{location.country_id}')
+        cache.delete(f'location_cities_{location.id}')
+    else:  # City
+        cache.delete(f'location_cities_{location.parent_id}')
+    cache.delete(f'location_coords_{location.level}')
+
 def invalidate_location_cache(location_id=None):
     """Invalidate location caches"""
     if location_id:
-        location = Location.objects.get(id=location_id)
-        if location.level == 1:  # Country
-            cache.delete('location_countries')
-            cache.delete(f'location_states_{location_id}')
-            cache.delete(f'location_cities_{location_id}')
-        elif location.level == 2:  # State
-            cache.delete(f'location_states_{location.country_id}')
-            cache.delete(f'location_cities_{location_id}')
-        else:  # City
-            cache.delete(f'location_cities_{location.parent_id}')
+        invalidate_location(Location.objects.get(id=location_id))
     else:
         # Invalidate all location caches
-        cache.delete_pattern('location_*')
\ No newline at end of file
+        cache.delete_pattern('location_*')
+
+
+def get_cached_role_telegram_ids(role):
+    """Get telegram IDs of active users with a role from cache or database"""
+    key = f'role_telegram_ids_{role}'
+    telegram_ids = cache.get(key)
+    
+    if telegram_ids is None:
+        telegram_ids = list(User.objects.filter(
+            role=role,
+            is_active=True
+        ).values_list('telegram_id', flat=True))
+        cache.set(key, telegram_ids, ROLE_RECIPIENTS_TTL)
+    
+    return telegram_ids
+
+def invalidate_role_telegram_ids():
+    """Invalidate cached recipients of every role"""
+    cache.delete_many([f'role_telegram_ids_{role}' for role in User.UserRole.values])
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.5 on 2026-10-15 13:30
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+def copy_telegram_id(apps, schema_editor):
+    NotificationOutbox = apps.get_model('core', 'NotificationOutbox')
+    for row in NotificationOutbox.objects.all():
+        row.telegram_ids = [row.telegram_id]
+        row.save(update_fields=['telegram_ids'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationoutbox',
+            name='telegram_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), default=list, size=None),
+        ),
+        migrations.RunPython(copy_telegram_id, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='notificationoutbox',
+            name='telegram_id',
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.fields import ArrayField
 from users.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -100,6 +101,22 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.message[:50]}"
 
+class NotificationOutbox(models.Model):
+    """
+    Telegram message waiting to be sent to one or more users. Rows are
+    written in the same transaction as the change they announce and sent
+    by the send_outbox_notifications periodic task
+    """
+    message = models.TextField()
+    telegram_ids = ArrayField(models.CharField(max_length=100), default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{len(self.telegram_ids)} recipients - {self.message[:50]}"
+
 class Favorite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='favorites')
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
@@ -5,6 +5,29 @@ from .models import (
     TelegramMessage, SearchFilter, Location
 )
 from users.serializers import UserProfileSerializer
+from .cache import get_cached_location
+
+class CachedLocationField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField for Location that resolves the submitted id
+    through the location cache instead of querying the database
+    """
+    def __init__(self, *, level, **kwargs):
+        self.level = level
+        # Still used for choices in the browsable API and the schema
+        kwargs.setdefault('queryset', Location.objects.filter(level=level))
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            location = get_cached_location(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if location is None or location.level != self.level:
+            self.fail('does_not_exist', pk_value=data)
+        return location
 
 class LocationListSerializer(serializers.ModelSerializer):
     """Simple serializer for location lists"""
@@ -14,6 +37,9 @@ class LocationListSerializer(serializers.ModelSerializer):
 
 class LocationDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer with hierarchy information"""
+    # parent/country names and the hierarchy walk (city > region > country)
+    SELECT_RELATED = ('parent__parent', 'country')
+
     parent_name = serializers.CharField(source='parent.name', read_only=True)
     country_name = serializers.CharField(source='country.name', read_only=True)
     hierarchy = serializers.SerializerMethodField()
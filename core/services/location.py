@@ -1,13 +1,20 @@
 from math import radians, sin, cos, sqrt, atan2
 from typing import List, Optional, Dict, Any
-from django.db.models import Q
+import numpy as np
+from django.db.models import Q, FloatField, QuerySet
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
 from core.models import Location
 from core.cache import (
     get_cached_countries,
     get_cached_states,
-    get_cached_cities
+    get_cached_cities,
+    get_cached_coordinates
 )
 
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.045  # Length of one degree of latitude
+
+
 class LocationService:
     @staticmethod
     def get_location_hierarchy(location_id: int) -> List[Dict[str, Any]]:
@@ -31,6 +38,40 @@ class LocationService:
         
         return R * c
     
+    @staticmethod
+    def haversine_distances(
+        lat0: float,
+        lon0: float,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        cos_lats: np.ndarray
+    ) -> np.ndarray:
+        """
+        Haversine distances in km from one point to arrays of points.
+        All coordinates are in radians; cos_lats is cos(lats), precomputed.
+        Works in place on two buffers instead of allocating a temporary
+        array for every step of the formula.
+        """
+        distances = np.subtract(lons, lon0)
+        distances *= 0.5
+        np.sin(distances, out=distances)
+        np.square(distances, out=distances)
+        distances *= cos_lats
+        distances *= cos(lat0)
+        
+        sin_dlat = np.subtract(lats, lat0)
+        sin_dlat *= 0.5
+        np.sin(sin_dlat, out=sin_dlat)
+        np.square(sin_dlat, out=sin_dlat)
+        distances += sin_dlat
+        
+        # Rounding can push a slightly above 1 for antipodal points
+        np.minimum(distances, 1.0, out=distances)
+        np.sqrt(distances, out=distances)
+        np.arcsin(distances, out=distances)
+        distances *= 2 * EARTH_RADIUS_KM
+        return distances
+    
     @staticmethod
     def find_locations_in_radius(
         latitude: float,
@@ -39,28 +80,67 @@ class LocationService:
         level: int = 3
     ) -> List[Dict[str, Any]]:
         """Find all locations within specified radius"""
-        locations = Location.objects.filter(level=level)
+        ids, lats, lons, cos_lats = get_cached_coordinates(level)
+        distances = LocationService.haversine_distances(
+            radians(latitude), radians(longitude), lats, lons, cos_lats
+        )
+        
+        mask = distances <= radius
+        distance_by_id = dict(zip(ids[mask].tolist(), distances[mask].tolist()))
+        if not distance_by_id:
+            return []
         
-        results = []
-        for location in locations:
-            if location.latitude and location.longitude:
-                distance = LocationService.calculate_distance(
-                    latitude, longitude,
-                    float(location.latitude),
-                    float(location.longitude)
-                )
-                if distance <= radius:
-                    results.append({
-                        'id': location.id,
-                        'name': location.name,
-                        'distance': round(distance, 2),
-                        'latitude': location.latitude,
-                        'longitude': location.longitude,
-                        'full_name': location.full_name
-                    })
+        locations = Location.objects.filter(
+            id__in=distance_by_id
+        ).select_related('parent__parent')
+        
+        results = [
+            {
+                'id': location.id,
+                'name': location.name,
+                'distance': round(distance_by_id[location.id], 2),
+                'latitude': location.latitude,
+                'longitude': location.longitude,
+                'full_name': location.full_name
+            }
+            for location in locations
+        ]
         
         return sorted(results, key=lambda x: x['distance'])
 
+    @staticmethod
+    def locations_in_radius_queryset(
+        latitude: float,
+        longitude: float,
+        radius: float,
+        level: int = 3
+    ) -> QuerySet:
+        """
+        Build a queryset of locations within specified radius.
+        The distance is computed by the database: a bounding box on
+        latitude/longitude narrows rows using location_coords_idx, then the
+        Haversine distance is checked only for the remaining candidates.
+        """
+        lat_delta = radius / KM_PER_DEGREE
+        # Degrees of longitude get shorter towards the poles
+        lon_delta = radius / (KM_PER_DEGREE * max(cos(radians(latitude)), 0.01))
+
+        lat0, lon0 = radians(latitude), radians(longitude)
+        lat = Radians(Cast('latitude', FloatField()))
+        lon = Radians(Cast('longitude', FloatField()))
+        a = (
+            Power(Sin((lat - lat0) / 2.0), 2) +
+            cos(lat0) * Cos(lat) * Power(Sin((lon - lon0) / 2.0), 2)
+        )
+
+        return Location.objects.filter(
+            level=level,
+            latitude__range=(latitude - lat_delta, latitude + lat_delta),
+            longitude__range=(longitude - lon_delta, longitude + lon_delta),
+        ).annotate(
+            distance=2.0 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+        ).filter(distance__lte=radius)
+
     @staticmethod
     def search_locations(
         query: str,
@@ -0,0 +1,42 @@
+from typing import Dict, Iterable, List, Optional
+
+# Rows per INSERT when writing to the outbox
+OUTBOX_BATCH_SIZE = 1000
+
+
+def queue_broadcast(message: str, telegram_ids: Iterable[str], using: Optional[str] = None) -> None:
+    """
+    Queue one message for many users in the notification outbox.
+    The row is part of the current transaction, so nothing is sent if it
+    rolls back; send_outbox_notifications delivers it.
+    """
+    from core.models import NotificationOutbox
+
+    telegram_ids = list(telegram_ids)
+    if not telegram_ids:
+        return
+    NotificationOutbox.objects.using(using).create(
+        message=message,
+        telegram_ids=telegram_ids
+    )
+
+
+def queue_bulk_messages(messages: List[Dict[str, str]], using: Optional[str] = None) -> None:
+    """
+    Queue {"telegram_id", "message"} dicts in the notification outbox,
+    one row per distinct message text
+    """
+    from core.models import NotificationOutbox
+
+    recipients_by_message = {}
+    for msg in messages:
+        recipients_by_message.setdefault(msg["message"], []).append(msg["telegram_id"])
+    if not recipients_by_message:
+        return
+    NotificationOutbox.objects.using(using).bulk_create(
+        [
+            NotificationOutbox(message=message, telegram_ids=telegram_ids)
+            for message, telegram_ids in recipients_by_message.items()
+        ],
+        batch_size=OUTBOX_BATCH_SIZE
+    )
@@ -1,11 +1,78 @@
 from typing import List, Dict, Any, Tuple, Union
+import hashlib
 import logging
+import random
+import time
+import redis
 import requests
 from django.conf import settings
 from celery import shared_task
 
+from .view_counter import get_redis
+
 logger = logging.getLogger(__name__)
 
+# Telegram allows ~30 messages/s per bot and ~20/min per chat, stay below both
+GLOBAL_RATE_LIMIT = 25  # per second
+CHAT_RATE_LIMIT = 15  # per minute
+# Identical messages to one chat within this window are sent once
+NOTIFICATION_DEDUP_TTL = 30
+
+
+def is_duplicate_notification(telegram_id: str, message: str) -> bool:
+    """Mark the message as sent to the chat; True if it already was within the window"""
+    digest = hashlib.sha1(message.encode()).hexdigest()
+    key = f'tg:dedup:{telegram_id}:{digest}'
+    return not get_redis().set(key, 1, nx=True, ex=NOTIFICATION_DEDUP_TTL)
+
+
+# Checks both buckets and counts the send only when both have room, so
+# rejected attempts and retries don't use up the quota.
+# Returns 0 if granted, 1 if the bot is over its limit, 2 if the chat is
+SEND_SLOT_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') >= tonumber(ARGV[1]) then
+    return 1
+end
+if tonumber(redis.call('GET', KEYS[2]) or '0') >= tonumber(ARGV[2]) then
+    return 2
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], 2)
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], 60)
+return 0
+"""
+
+
+def acquire_send_slot(telegram_id: str) -> float:
+    """
+    Take a send slot from the global (per second) and per-chat (per minute)
+    buckets. Returns 0 if the message may go now, otherwise seconds until
+    the full bucket's window ends. Sends go unthrottled if Redis is down
+    """
+    now = time.time()
+    second = int(now)
+    try:
+        result = get_redis().eval(
+            SEND_SLOT_SCRIPT, 2,
+            f'tg:bucket:global:{second}',
+            f'tg:bucket:{telegram_id}:{second // 60}',
+            GLOBAL_RATE_LIMIT, CHAT_RATE_LIMIT
+        )
+    except redis.RedisError:
+        logger.warning("Redis unavailable, sending Telegram message without rate limiting")
+        return 0
+    if result == 1:
+        return second + 1 - now
+    if result == 2:
+        return 60 - now % 60
+    return 0
+
+
+def retry_countdown(wait: float, retries: int) -> float:
+    """Wait for the window plus a jitter that grows with retries, so throttled tasks spread out"""
+    return wait + random.uniform(0, min(2 ** retries, 60))
+
 class TelegramNotificationService:
     def __init__(self):
         self.token = settings.TELEGRAM_BOT_TOKEN
@@ -32,13 +99,64 @@ class TelegramNotificationService:
             logger.error(f"Error sending Telegram message: {str(e)}")
             return False
 
+    def send_throttled(self, telegram_id: str, message: str) -> bool:
+        """
+        Send within the rate limits, for loops over many chats. Waits for the
+        bot-wide window; a chat over its own limit is handed to send_notification
+        so one busy chat doesn't hold up the rest
+        """
+        wait = acquire_send_slot(telegram_id)
+        while 0 < wait <= 1:
+            time.sleep(wait)
+            wait = acquire_send_slot(telegram_id)
+        if wait:
+            self.send_notification.apply_async((telegram_id, message), countdown=retry_countdown(wait, 0))
+            return False
+        return self.send_message(telegram_id, message)
+
     @staticmethod
-    @shared_task
-    def send_notification(telegram_id: str, message: str) -> bool:
-        """Celery task to send notification to a user"""
+    @shared_task(bind=True, max_retries=None)
+    def send_notification(task, telegram_id: str, message: str) -> bool:
+        """
+        Celery task to send notification to a user.
+        Repeats of the same message are dropped and sends over the Telegram
+        limits are retried until a slot frees up
+        """
+        try:
+            # A retry was already recorded by its first attempt
+            if task.request.retries == 0 and is_duplicate_notification(telegram_id, message):
+                return False
+        except redis.RedisError:
+            logger.warning("Redis unavailable, skipping Telegram notification deduplication")
+
+        wait = acquire_send_slot(telegram_id)
+        if wait:
+            raise task.retry(countdown=retry_countdown(wait, task.request.retries))
+
         service = TelegramNotificationService()
         return service.send_message(telegram_id, message)
 
+    @staticmethod
+    @shared_task
+    def send_broadcast(message: str, telegram_ids: List[str]) -> None:
+        """Send one message to many users via Celery"""
+        service = TelegramNotificationService()
+        for telegram_id in telegram_ids:
+            service.send_throttled(telegram_id, message)
+
+    @staticmethod
+    @shared_task
+    def send_broadcast_notification(role: str, message: str) -> None:
+        """
+        Send one message to every active user with a role.
+        Recipients are read on the worker, so the caller enqueues a single task
+        """
+        from core.cache import get_cached_role_telegram_ids
+
+        service = TelegramNotificationService()
+        for telegram_id in get_cached_role_telegram_ids(role):
+            service.send_throttled(telegram_id, message)
+
     @staticmethod
     @shared_task
     def send_bulk_messages(messages: List[Union[Dict[str, str], Tuple[str, str]]]) -> None:
@@ -56,7 +174,7 @@ class TelegramNotificationService:
                 continue
                 
             if telegram_id and message:
-                service.send_message(telegram_id, message)
+                service.send_throttled(telegram_id, message)
 
     def format_cargo_notification(self, cargo: Any, action: str) -> str:
         """Format a cargo notification message"""
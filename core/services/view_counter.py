@@ -0,0 +1,97 @@
+import logging
+from functools import lru_cache
+from typing import Dict
+
+import redis
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Redis hash of cargo id -> views not yet written to the database
+CARGO_VIEWS_KEY = 'cargo:views'
+# Rows per UPDATE when flushing
+VIEWS_FLUSH_BATCH_SIZE = 1000
+# Upper bound on one flush, the lock is released early when it finishes
+VIEWS_FLUSH_LOCK_TIMEOUT = 300
+
+
+@lru_cache(maxsize=None)
+def get_redis() -> redis.Redis:
+    """Shared client, the connection pool is per process"""
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def record_cargo_view(cargo_id: int) -> None:
+    """
+    Count one view in Redis; flush_cargo_views moves the totals to
+    Cargo.views_count, so page views don't write the cargo row.
+    Falls back to a direct UPDATE if Redis is unavailable.
+    """
+    try:
+        get_redis().hincrby(CARGO_VIEWS_KEY, cargo_id, 1)
+    except redis.RedisError:
+        logger.warning("Redis unavailable, counting cargo view in the database")
+        from django.db.models import F
+        from cargo.models import Cargo
+        Cargo.objects.filter(pk=cargo_id).update(views_count=F('views_count') + 1)
+
+
+def flush_cargo_views() -> int:
+    """
+    Add the buffered views to Cargo.views_count, one UPDATE ... FROM (VALUES)
+    per batch. The hash is renamed first, so views counted meanwhile go
+    into a fresh one. Runs are serialized by a Redis lock: an overlapping
+    run would apply the same pending hash twice. Returns the number of
+    cargos updated, 0 if another flush is in progress.
+    """
+    client = get_redis()
+    lock = client.lock(
+        f'{CARGO_VIEWS_KEY}:flush-lock',
+        timeout=VIEWS_FLUSH_LOCK_TIMEOUT,
+        blocking=False
+    )
+    if not lock.acquire():
+        return 0
+    try:
+        return _flush_pending_views(client)
+    finally:
+        try:
+            lock.release()
+        except redis.exceptions.LockError:
+            # Expired mid-flush, the timeout is too short for the backlog
+            logger.warning("Cargo views flush outlived its lock")
+
+
+def _flush_pending_views(client: redis.Redis) -> int:
+    from cargo.models import Cargo
+
+    pending_key = f'{CARGO_VIEWS_KEY}:flushing'
+    # A leftover from a failed flush is retried before taking new counts
+    if not client.exists(pending_key):
+        try:
+            client.rename(CARGO_VIEWS_KEY, pending_key)
+        except redis.ResponseError:
+            # Nothing was viewed since the last flush
+            return 0
+
+    counts: Dict[int, int] = {
+        int(cargo_id): int(views)
+        for cargo_id, views in client.hgetall(pending_key).items()
+    }
+    rows = list(counts.items())
+    table = connection.ops.quote_name(Cargo._meta.db_table)
+
+    updated = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), VIEWS_FLUSH_BATCH_SIZE):
+            batch = rows[start:start + VIEWS_FLUSH_BATCH_SIZE]
+            values = ', '.join(['(%s, %s)'] * len(batch))
+            cursor.execute(
+                f'UPDATE {table} SET views_count = {table}.views_count + v.views '
+                f'FROM (VALUES {values}) AS v(id, views) WHERE {table}.id = v.id',
+                [param for row in batch for param in row]
+            )
+            updated += cursor.rowcount
+    client.delete(pending_key)
+    return updated
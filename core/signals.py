@@ -1,12 +1,17 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 
 from users.models import User
-from .models import Notification
+from .models import Location, Notification
+from .cache import (
+    get_cached_role_telegram_ids,
+    invalidate_location,
+    invalidate_role_telegram_ids
+)
 from cargo.models import Cargo, CarrierRequest
+from .services.notifications import queue_broadcast
 from .services.telegram import TelegramNotificationService
-import asyncio
 
 import logging
 telegram_service = TelegramNotificationService()
@@ -14,6 +19,28 @@ telegram_service = TelegramNotificationService()
 
 logger = logging.getLogger(__name__)
 
+# User fields that decide who is in a cached role recipient list
+ROLE_RECIPIENT_FIELDS = frozenset({'role', 'is_active', 'telegram_id'})
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_caches(sender, instance, **kwargs):
+    """Drop cached location data when a location changes"""
+    invalidate_location(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_role_recipients(sender, instance, **kwargs):
+    """Drop cached role recipients when a user changes (role may have changed)"""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not ROLE_RECIPIENT_FIELDS.intersection(update_fields):
+        # e.g. last_login or rating updates, recipients are unchanged
+        return
+    invalidate_role_telegram_ids()
+
+
 @receiver(post_save, sender=Notification)
 def send_telegram_notification(sender, instance, created, **kwargs):
     """Send notification to Telegram when new notification is created"""
@@ -42,13 +69,9 @@ def send_telegram_notification(sender, instance, created, **kwargs):
         else:
             message = instance.message
             
-        # Get user's telegram ID
-        telegram_id = instance.user.telegram_id
-        
-        # Send message asynchronously
-        asyncio.create_task(
-            telegram_service.send_message(telegram_id, message)
-        )
+        # Queue in the outbox: sent by send_outbox_notifications after commit,
+        # not over HTTP from the request thread (user_id is the telegram ID)
+        queue_broadcast(message, [instance.user_id])
         
     except Exception as e:
         logger.error(f"Failed to send Telegram notification: {str(e)}")
@@ -72,37 +95,27 @@ def notify_cargo_status_change(sender, instance, created, **kwargs):
         action = ""
         
         if new_status == 'pending_approval':
-            # Notify managers
-            recipients = User.objects.filter(
-                role='manager',
-                is_active=True,
-                telegram_id__isnull=False
-            )
+            # Notify managers (cached role list, no query per save)
+            recipients = get_cached_role_telegram_ids(User.UserRole.MANAGER)
             action = f"Новый груз требует проверки: {instance.title}"
             
         elif new_status == 'manager_approved':
             # Notify students
-            recipients = User.objects.filter(
-                role='student',
-                is_active=True,
-                telegram_id__isnull=False
-            )
+            recipients = get_cached_role_telegram_ids(User.UserRole.STUDENT)
             action = f"Новый груз доступен: {instance.title}"
             
         elif new_status == 'assigned':
-            # Notify carrier
-            if instance.assigned_to and instance.assigned_to.telegram_id:
-                recipients = [instance.assigned_to]
+            # Notify carrier (foreign key values are telegram IDs)
+            if instance.assigned_to_id:
+                recipients = [instance.assigned_to_id]
                 action = f"Вам назначен груз: {instance.title}"
 
-        # Send notifications via Telegram
+        # One outbox row for all recipients
         if recipients and action:
-            for recipient in recipients:
-                if recipient.telegram_id:
-                    telegram_service.send_notification.delay(
-                        recipient.telegram_id, 
-                        telegram_service.format_cargo_notification(instance, action)
-                    )
+            queue_broadcast(
+                telegram_service.format_cargo_notification(instance, action),
+                recipients
+            )
 
 @receiver(post_save, sender=CarrierRequest)
 def notify_carrier_request_status_change(sender, instance, created, **kwargs):
@@ -118,20 +131,18 @@ def notify_carrier_request_status_change(sender, instance, created, **kwargs):
         action = ""
         
         if new_status == 'assigned':
-            if instance.carrier and instance.carrier.telegram_id:
-                recipients = [instance.carrier]
+            if instance.carrier_id:
+                recipients = [instance.carrier_id]
                 action = "Вам назначен груз"
                 
         elif new_status in ['accepted', 'rejected']:
-            if instance.assigned_by and instance.assigned_by.telegram_id:
-                recipients = [instance.assigned_by]
+            if instance.assigned_by_id:
+                recipients = [instance.assigned_by_id]
                 action = f"Перевозчик {'принял' if new_status == 'accepted' else 'отклонил'} назначенный груз"
 
-        # Send notifications via Telegram
+        # Queue in the outbox, sent after commit
         if recipients and action:
-            for recipient in recipients:
-                if recipient.telegram_id:
-                    telegram_service.send_notification.delay(
-                        recipient.telegram_id,
-                        telegram_service.format_carrier_notification(instance, action)
-                    )
\ No newline at end of file
+            queue_broadcast(
+                telegram_service.format_carrier_notification(instance, action),
+                recipients
+            )
\ No newline at end of file
@@ -2,6 +2,7 @@ from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
+from django.db import transaction
 from django.contrib.auth import get_user_model
 import logging
 
@@ -18,11 +19,45 @@ def clean_old_notifications():
     
     logger.info(f"Cleaned {deleted_count} old notifications")
 
+@shared_task
+def send_outbox_notifications(batch_size=500):
+    """Send queued outbox notifications, one Telegram task per message"""
+    from core.models import NotificationOutbox
+    from core.services.telegram import telegram_service
+    
+    with transaction.atomic():
+        # skip_locked lets overlapping runs take different rows
+        rows = list(
+            NotificationOutbox.objects.select_for_update(skip_locked=True)
+            .order_by('id')
+            .values('id', 'message', 'telegram_ids')[:batch_size]
+        )
+        if not rows:
+            return
+        NotificationOutbox.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        
+        def dispatch():
+            for row in rows:
+                telegram_service.send_broadcast.delay(row['message'], row['telegram_ids'])
+        transaction.on_commit(dispatch)
+    
+    logger.info(f"Queued {len(rows)} outbox notifications")
+
+@shared_task
+def flush_cargo_views():
+    """Write cargo view counts buffered in Redis to the database"""
+    from core.services.view_counter import flush_cargo_views as flush
+    
+    updated = flush()
+    if updated:
+        logger.info(f"Flushed view counts for {updated} cargos")
+
 @shared_task
 def check_expired_cargos():
     """Check for expired cargo listings and notify owners"""
     from cargo.models import Cargo
-    from core.services.telegram import telegram_service
+    from cargo.utils import iter_cargo_chunks
+    from core.services.notifications import queue_bulk_messages
     
     threshold = timezone.now().date()
     expired_cargos = Cargo.objects.filter(
@@ -30,14 +65,27 @@ def check_expired_cargos():
         loading_date__lt=threshold
     )
     
-    for cargo in expired_cargos:
-        # Update cargo status
-        cargo.status = Cargo.CargoStatus.EXPIRED
-        cargo.save()
-        
-        # Notify owner if they exist
-        if cargo.owner and cargo.owner.telegram_id:
-            message = f"""
+    # One UPDATE and one outbox insert per keyset page instead of a save()
+    # per cargo; save() side effects are replaced by the messages below
+    expired_count = 0
+    for chunk in iter_cargo_chunks(expired_cargos.only('id')):
+        with transaction.atomic():
+            # Re-read the page under lock: cargos whose status changed since
+            # the keyset read are neither expired nor notified
+            cargos = list(
+                expired_cargos.select_for_update()
+                .filter(pk__in=[cargo.pk for cargo in chunk])
+                .only(
+                    'title', 'loading_point', 'unloading_point',
+                    'loading_date', 'owner', 'managed_by'
+                )
+            )
+            if not cargos:
+                continue
+            
+            messages = []
+            for cargo in cargos:
+                message = f"""
 ⚠️ <b>Груз просрочен</b>
 
 <b>Груз:</b> {cargo.title}
@@ -46,12 +94,17 @@ def check_expired_cargos():
 
 Статус груза изменен на "Просрочен".
 """
-            telegram_service.send_notification.delay(
-                cargo.owner.telegram_id,
-                message
-            )
+                # Notify owner and managing student (foreign key values are telegram IDs)
+                for telegram_id in (cargo.owner_id, cargo.managed_by_id):
+                    if telegram_id:
+                        messages.append({'telegram_id': telegram_id, 'message': message})
+            
+            expired_count += Cargo.objects.filter(
+                pk__in=[cargo.pk for cargo in cargos]
+            ).update(status=Cargo.CargoStatus.EXPIRED, updated_at=timezone.now())
+            queue_bulk_messages(messages)
     
-    logger.info(f"Marked {expired_cargos.count()} cargos as expired")
+    logger.info(f"Marked {expired_count} cargos as expired")
 
 @shared_task
 def check_expiring_documents():
@@ -3,7 +3,9 @@ from logit_backend.celery import app
 from core.tasks import (
     clean_old_notifications,
     check_expired_cargos,
-    check_expiring_documents
+    check_expiring_documents,
+    send_outbox_notifications,
+    flush_cargo_views
 )
 
 # Schedule periodic tasks
@@ -16,6 +18,14 @@ app.conf.beat_schedule = {
         'task': 'core.tasks.check_expired_cargos',
         'schedule': crontab(hour='*/3'),  # Every 3 hours
     },
+    'send-outbox-notifications': {
+        'task': 'core.tasks.send_outbox_notifications',
+        'schedule': 10.0,  # Every 10 seconds
+    },
+    'flush-cargo-views': {
+        'task': 'core.tasks.flush_cargo_views',
+        'schedule': 60.0,  # Every minute
+    },
     'check-expiring-documents': {
         'task': 'core.tasks.check_expiring_documents',
         'schedule': crontab(hour=9, minute=0),  # Daily at 9 AM
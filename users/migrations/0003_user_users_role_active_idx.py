@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-15 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_remove_historicaluser_history_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'is_active'], name='users_role_active_idx'),
+        ),
+    ]
@@ -113,6 +113,10 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name = _('user')
         verbose_name_plural = _('users')
         ordering = ['-date_joined']
+        indexes = [
+            # Role broadcasts: active users of one role
+            models.Index(fields=['role', 'is_active'], name='users_role_active_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_full_name()} ({self.telegram_id})"
@@ -79,6 +79,9 @@ class TelegramAuthSerializer(serializers.Serializer):
         return value
 
 class UserProfileSerializer(serializers.ModelSerializer):
+    # Reverse relations rendered below, see profile_prefetch_lookups
+    PREFETCH_RELATED = ('documents__verified_by', 'ratings_received')
+
     documents = UserDocumentSerializer(many=True, read_only=True)
     rating_count = serializers.SerializerMethodField()
     full_name = serializers.CharField(source='get_full_name', read_only=True)
@@ -100,12 +103,41 @@ class UserProfileSerializer(serializers.ModelSerializer):
     
     @extend_schema_field({'type': 'integer'})
     def get_rating_count(self, obj) -> int:
+        if 'ratings_received' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.ratings_received.all())
         return obj.ratings_received.count()
     
     # def get_rating_count(self, obj):
     #     return obj.ratings_received.count()
 
 
+def profile_prefetch_lookups(*paths):
+    """
+    prefetch_related lookups for users nested as UserProfileSerializer
+    under the given relation paths (the users themselves are expected
+    to be select_related)
+    """
+    return tuple(
+        f'{path}__{lookup}'
+        for path in paths
+        for lookup in UserProfileSerializer.PREFETCH_RELATED
+    )
+
+
+class CachedUserProfileSerializer(UserProfileSerializer):
+    """
+    UserProfileSerializer for nesting in list responses: each user is
+    rendered once per response and reused wherever it recurs (the same
+    owner across many cargos, one user as both owner and manager)
+    """
+    def to_representation(self, instance):
+        cache = self.context.setdefault('_user_profiles', {})
+        data = cache.get(instance.pk)
+        if data is None:
+            data = cache[instance.pk] = super().to_representation(instance)
+        return data
+
+
     
     
 class UserUpdateSerializer(serializers.ModelSerializer):
@@ -6,7 +6,7 @@ from .models import (
     VehicleAvailability,
     VehicleInspection
 )
-from users.serializers import UserProfileSerializer
+from users.serializers import UserProfileSerializer, profile_prefetch_lookups
 
 class VehicleDocumentSerializer(serializers.ModelSerializer):
     verified_by = UserProfileSerializer(read_only=True)
@@ -93,6 +93,16 @@ class VehicleAvailabilitySerializer(serializers.ModelSerializer):
 
 class VehicleSerializer(serializers.ModelSerializer):
     """Full vehicle serializer with all details"""
+    # Relations rendered below, for querysets nesting vehicles
+    SELECT_RELATED = ('owner', 'verified_by')
+    PREFETCH_RELATED = (
+        'documents__verified_by', 'inspections__inspector', 'availability',
+        *profile_prefetch_lookups(
+            'owner', 'verified_by',
+            'documents__verified_by', 'inspections__inspector'
+        )
+    )
+
     owner = UserProfileSerializer(read_only=True)
     documents = VehicleDocumentSerializer(many=True, read_only=True)
     inspections = VehicleInspectionSerializer(many=True, read_only=True)